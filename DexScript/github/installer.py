@@ -39,7 +39,26 @@ class InstallerConfig:
     """
 
     github = ["Dotsian/DexScript", "main"]
-    files = ["__init__.py", "cog.py", "commands.py", "parser.py", "utils.py"]
+    files = [
+        "__init__.py",
+        "bus.py",
+        "cache.py",
+        "cog.py",
+        "commands.py",
+        "expressions.py",
+        "filesystem.py",
+        "jobs.py",
+        "journal.py",
+        "lexer.py",
+        "metrics.py",
+        "output.py",
+        "parser.py",
+        "presets.py",
+        "registry.py",
+        "scheduler.py",
+        "utils.py",
+        "watchdog.py",
+    ]
     appearance = {
         "logo": "https://raw.githubusercontent.com/Dotsian/DexScript/refs/heads/dev/assets/DexScriptLogo.png",
         "logo_error": "https://raw.githubusercontent.com/Dotsian/DexScript/refs/heads/dev/assets/DexScriptLogoError.png",
@@ -0,0 +1,205 @@
+import asyncio
+import contextlib
+import json
+import os
+import socket
+import tempfile
+import uuid
+from pathlib import Path
+from typing import Callable
+
+from tortoise import connections
+
+from .filesystem import FileSystem
+from .metrics import metrics
+from .utils import Utils
+
+CHANNEL = "dexscript_invalidation"
+SOCKET_PATH = Path(tempfile.gettempdir()) / "dexscript-bus"
+BACKENDS = ("auto", "postgres", "socket")
+
+
+class BusProtocol(asyncio.DatagramProtocol):
+    def __init__(self, bus):
+        self.bus = bus
+
+    def datagram_received(self, data, addr):
+        self.bus.receive(data.decode())
+
+
+class InvalidationBus:
+    """
+    Broadcasts model-level change events between every process running DexScript, so each
+    process can evict cached data another process has changed. Events are sent through
+    Postgres `LISTEN/NOTIFY`, or through Unix datagram sockets for local deployments.
+    """
+
+    def __init__(self, socket_path: str | Path = SOCKET_PATH):
+        self.id = uuid.uuid4().hex
+        self.socket_path = Path(socket_path)
+        self.backend = None
+
+        self.handlers: list[Callable] = [Utils.invalidate]
+
+        self._context = None
+        self._connection = None
+        self._transport = None
+        self._sender = None
+        self._socket_file = None
+
+    def subscribe(self, handler: Callable):
+        """
+        Registers a function that will be called with the name of every model changed by
+        another process, or None if every model may have changed.
+
+        Parameters
+        ----------
+        handler: Callable
+            The function you want to register.
+        """
+        self.handlers.append(handler)
+
+    def receive(self, payload: str):
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            return
+
+        if event.get("sender") == self.id:
+            return
+
+        metrics.increment("dexscript_invalidations_received_total")
+
+        for handler in self.handlers:
+            handler(event.get("model"))
+
+    @staticmethod
+    def _postgres_client():
+        with contextlib.suppress(Exception):
+            client = connections.get("default")
+
+            if client.capabilities.dialect == "postgres":
+                return client
+
+        return None
+
+    def _notification(self, connection, pid, channel, payload):
+        self.receive(payload)
+
+    async def _start_postgres(self):
+        client = self._postgres_client()
+
+        if client is None:
+            raise Exception("The default database connection does not use Postgres")
+
+        self._context = client.acquire_connection()
+        self._connection = await self._context.__aenter__()
+
+        await self._connection.add_listener(CHANNEL, self._notification)
+
+    async def _start_socket(self):
+        os.makedirs(self.socket_path, exist_ok=True)
+
+        self._socket_file = self.socket_path / f"{os.getpid()}-{self.id[:8]}.sock"
+        self._transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+            lambda: BusProtocol(self), local_addr=str(self._socket_file), family=socket.AF_UNIX
+        )
+
+        self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sender.setblocking(False)
+
+    async def start(self, backend: str | None):
+        """
+        Starts listening for events from other processes, stopping the current backend first.
+
+        Parameters
+        ----------
+        backend: str | None
+            `postgres`, `socket`, or `auto` to use Postgres when the database supports it.
+            If None, the bus will be disabled.
+        """
+        await self.stop()
+
+        if backend is not None and backend.lower() not in BACKENDS:
+            raise Exception(f"'{backend}' is not a valid backend ({', '.join(BACKENDS)})")
+
+        if backend is not None and backend.lower() == "auto":
+            backend = "postgres" if self._postgres_client() is not None else None
+
+        match None if backend is None else backend.lower():
+            case "postgres":
+                await self._start_postgres()
+
+            case "socket":
+                await self._start_socket()
+
+            case _:
+                return
+
+        self.backend = backend.lower()
+
+    async def stop(self):
+        if self._connection is not None:
+            with contextlib.suppress(Exception):
+                await self._connection.remove_listener(CHANNEL, self._notification)
+
+            with contextlib.suppress(Exception):
+                await self._context.__aexit__(None, None, None)
+
+        if self._transport is not None:
+            self._transport.close()
+            self._sender.close()
+
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self._socket_file)
+
+        self.backend = None
+
+        self._context = self._connection = None
+        self._transport = self._sender = self._socket_file = None
+
+    def _send_socket(self, data: bytes):
+        for name in os.listdir(self.socket_path):
+            path = self.socket_path / name
+
+            if path == self._socket_file:
+                continue
+
+            try:
+                self._sender.sendto(data, str(path))
+            except (ConnectionRefusedError, FileNotFoundError):
+                # The process that created this socket is no longer running.
+                with contextlib.suppress(OSError):
+                    os.remove(path)
+            except BlockingIOError:
+                metrics.increment("dexscript_invalidation_errors_total")
+
+    async def publish(self, model_name: str | None):
+        """
+        Notifies every other process that a model has changed.
+
+        Parameters
+        ----------
+        model_name: str | None
+            The name of the model that changed, or None if every model may have changed.
+        """
+        if self.backend is None:
+            return
+
+        payload = json.dumps({"sender": self.id, "model": model_name})
+
+        try:
+            if self.backend == "postgres":
+                await self._postgres_client().execute_query(
+                    "SELECT pg_notify($1, $2)", [CHANNEL, payload]
+                )
+            else:
+                await FileSystem.run(self._send_socket, payload.encode())
+        except Exception:
+            metrics.increment("dexscript_invalidation_errors_total")
+            return
+
+        metrics.increment("dexscript_invalidations_sent_total")
+
+
+invalidation_bus = InvalidationBus()
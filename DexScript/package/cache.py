@@ -0,0 +1,120 @@
+import time
+from collections import OrderedDict
+
+from .metrics import metrics
+
+CACHE_SIZE = 256
+
+
+class QueryCache:
+    """
+    A bounded, least-recently-used cache for the results of read-only queries. Entries expire
+    after a TTL and are evicted whenever a DexScript command writes to their model.
+    """
+
+    def __init__(self, size: int = CACHE_SIZE):
+        self.size = size
+        self.entries = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, model_name: str, key: tuple, ttl: float):
+        """
+        Returns a cached result and whether it was found.
+
+        Parameters
+        ----------
+        model_name: str
+            The name of the model the query reads.
+        key: tuple
+            The normalized query.
+        ttl: float
+            How long a result can be cached for, in seconds.
+        """
+        entry = self.entries.get((model_name, key))
+
+        if entry is None or time.monotonic() - entry[0] > ttl:
+            self.misses += 1
+            metrics.increment("dexscript_cache_misses_total", model=model_name)
+            return None, False
+
+        self.entries.move_to_end((model_name, key))
+
+        self.hits += 1
+        metrics.increment("dexscript_cache_hits_total", model=model_name)
+
+        return entry[1], True
+
+    def set(self, model_name: str, key: tuple, result):
+        self.entries[(model_name, key)] = (time.monotonic(), result)
+        self.entries.move_to_end((model_name, key))
+
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    async def fetch(self, model_name: str, key: tuple, queryset, ttl: float):
+        """
+        Runs a read-only queryset, returning the cached result instead if the same query
+        was run within the TTL. If `ttl` is 0, the cache will be bypassed.
+
+        Parameters
+        ----------
+        model_name: str
+            The name of the model the query reads.
+        key: tuple
+            The normalized query, which must identify the queryset's result.
+        queryset: QuerySet
+            The queryset that will run on a cache miss.
+        ttl: float
+            How long the result can be cached for, in seconds.
+        """
+        if ttl > 0:
+            result, found = self.get(model_name, key, ttl)
+
+            if found:
+                return result
+
+        result = await queryset
+        metrics.query()
+
+        if ttl > 0:
+            self.set(model_name, key, result)
+
+        return result
+
+    def invalidate(self, model_name: str | None = None):
+        """
+        Evicts every cached result of a model, or every result if `model_name` is None.
+
+        Parameters
+        ----------
+        model_name: str | None
+            The name of the model that has been written to.
+        """
+        if model_name is None:
+            self.entries.clear()
+            return
+
+        for key in [x for x in self.entries if x[0] == model_name]:
+            del self.entries[key]
+
+    def reset(self):
+        self.hits = self.misses = self.evictions = 0
+
+    def summary(self) -> str:
+        """
+        Returns a human-readable line summarizing the cache's statistics.
+        """
+        lookups = self.hits + self.misses
+        hit_rate = self.hits / lookups * 100 if lookups else 0
+
+        return (
+            f"CACHE | {self.hits} HITS | {self.misses} MISSES | {hit_rate:.0f}% HIT RATE "
+            f"| {len(self.entries)}/{self.size} ENTRIES | {self.evictions} EVICTIONS"
+        )
+
+
+query_cache = QueryCache()
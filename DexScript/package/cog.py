@@ -1,4 +1,5 @@
 import base64
+import logging
 import re
 import traceback
 
@@ -7,11 +8,17 @@ import requests
 from ballsdex.settings import settings
 from discord.ext import commands
 
+from .bus import invalidation_bus
+from .filesystem import FileSystem
+from .metrics import metrics
 from .parser import DexScriptParser
+from .scheduler import scheduler
 from .utils import Utils, config
 
 __version__ = "0.5"
 
+log = logging.getLogger(__name__)
+
 
 class DexScript(commands.Cog):
     """
@@ -21,6 +28,20 @@ class DexScript(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
+    async def cog_load(self):
+        try:
+            await invalidation_bus.start(config.invalidation)
+        except Exception:
+            # Other processes won't be notified, but this process still evicts its own cache.
+            log.exception("Could not start the invalidation bus, using local invalidation")
+            await invalidation_bus.stop()
+
+        await scheduler.start(self.bot)
+
+    async def cog_unload(self):
+        await invalidation_bus.stop()
+        scheduler.stop()
+
     @staticmethod
     def check_version():
         if not config.versioncheck:
@@ -79,6 +100,13 @@ class DexScript(commands.Cog):
                 return
 
             await ctx.message.add_reaction("✅")
+        finally:
+            if config.metricspath:
+                await FileSystem.run(metrics.export, config.metricspath)
+
+            if dexscript_instance.watchdog is not None and dexscript_instance.watchdog.stalls:
+                await ctx.send("-# Event loop stalls detected while running:")
+                await Utils.message_list(ctx, dexscript_instance.watchdog.report(config.debug))
 
     @commands.command()
     @commands.is_owner()
@@ -162,6 +190,20 @@ class DexScript(commands.Cog):
 
         if isinstance(setting_value, bool):
             new_value = bool(value) if value else not setting_value
+        elif isinstance(setting_value, (int, float)) and value is not None:
+            try:
+                new_value = type(setting_value)(value)
+            except ValueError:
+                await ctx.send(f"`{value}` is not a valid value for `{setting}`.")
+                return
+
+        if setting == "invalidation":
+            try:
+                await invalidation_bus.start(new_value)
+            except Exception as error:
+                await invalidation_bus.stop()
+                await ctx.send(f"`{value}` is not a valid value for `{setting}`: {error}")
+                return
 
         setattr(config, setting, new_value)
 
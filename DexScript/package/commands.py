@@ -1,12 +1,23 @@
 import asyncio
+import contextlib
+import io
 import os
-import shutil
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from dataclasses import field as datafield
+from datetime import datetime
 
-import discord
+from tortoise import connections
+from tortoise.transactions import in_transaction
 
-from .utils import STATIC, Types, Utils
+from .cache import query_cache
+from .expressions import NUMERIC_FIELDS, RELATION_FIELDS, Expression
+from .filesystem import FileSystem, RowReader, RowWriter, normalize_image
+from .jobs import job_manager
+from .journal import journal
+from .metrics import metrics
+from .presets import preset_store
+from .scheduler import ScheduledScript, parse_duration, scheduler
+from .utils import STATIC, Types, Utils, config, media_store
 
 
 @dataclass
@@ -15,14 +26,131 @@ class Shared:
     Values that will be retained throughout the entire code execution.
     """
 
+    PREFETCH_LIMIT = 4
+
     attachments: list = datafield(default_factory=list)
+    downloads: dict = datafield(default_factory=dict)
+    variables: dict = datafield(default_factory=dict)
+    written: set | None = datafield(default_factory=set)
+
+    def mark_written(self, model_name: str | None):
+        """
+        Marks a model as written to, so every following read of that model uses the primary
+        connection. If `model_name` is None, every model will be marked.
+
+        Parameters
+        ----------
+        model_name: str | None
+            The name of the model that is about to be written to.
+        """
+        if model_name is None or self.written is None:
+            self.written = None
+            return
+
+        self.written.add(model_name)
+
+    def read_connection(self, model):
+        """
+        Returns the connection read-only queries of a model should use, or None if they
+        should use the primary connection.
+
+        Parameters
+        ----------
+        model: Value
+            The model that will be read.
+        """
+        if config.readconnection is None or self.written is None or model.name in self.written:
+            return None
+
+        return connections.get(config.readconnection)
+
+    def resolve(self, value):
+        """
+        Returns the value stored inside of a variable if `value` references one.
+
+        Parameters
+        ----------
+        value: Value
+            The value you want to resolve.
+        """
+        if value.type != Types.VARIABLE:
+            return value
+
+        name = value.name[1:].lower()
+
+        if name not in self.variables:
+            raise Exception(
+                f"'{value.name}' is not a defined variable\n"
+                f"Run `LET > {name.upper()} > ...` to define it"
+            )
+
+        return self.variables[name]
+
+    def prefetch(self):
+        """
+        Starts downloading every attachment concurrently, so commands that use them only
+        have to await a download that is already in progress.
+        """
+        semaphore = asyncio.Semaphore(self.PREFETCH_LIMIT)
+
+        async def download(attachment):
+            async with semaphore:
+                return await FileSystem.download(attachment)
+
+        for attachment in self.attachments:
+            if attachment.id not in self.downloads:
+                self.downloads[attachment.id] = asyncio.create_task(download(attachment))
+
+    async def download(self, attachment):
+        """
+        Returns the download of an attachment, awaiting its prefetch if it has already
+        started and downloading it otherwise.
+
+        Parameters
+        ----------
+        attachment: discord.Attachment
+            The attachment you want to download.
+        """
+        if attachment.id not in self.downloads:
+            self.downloads[attachment.id] = asyncio.create_task(
+                FileSystem.download(attachment)
+            )
+
+        return await self.downloads[attachment.id]
+
+    async def close(self):
+        """
+        Cancels unfinished downloads and removes downloaded files that were never used.
+        """
+        for task in self.downloads.values():
+            # Cancelled downloads remove their own partial file.
+            if not task.done():
+                task.cancel()
+                continue
+
+            if task.cancelled():
+                continue
+
+            with contextlib.suppress(Exception):
+                download = task.result()
+
+                if await FileSystem.isfile(download.path):
+                    await FileSystem.remove(download.path)
+
+        self.downloads.clear()
 
 
 class DexCommand:
     """
     Default class for all dex commands.
+
+    Plain-text messages sent with `ctx.send` are buffered and return None. Use
+    `ctx.send_now` for messages that are edited, deleted, or reacted to later.
     """
 
+    # Methods that never write to the database and can read from `config.readconnection`.
+    READ_ONLY = set()
+
     def __init__(self, bot, shared):
         self.bot = bot
         self.shared = shared
@@ -40,12 +168,80 @@ class DexCommand:
             "all attributes for that model"
         )
 
+    def read(self, model, queryset):
+        """
+        Routes a read-only queryset to the read connection, unless the model has already
+        been written to by the running script.
+
+        Parameters
+        ----------
+        model: Value
+            The model the queryset belongs to.
+        queryset: QuerySet
+            The queryset you want to route.
+        """
+        connection = self.shared.read_connection(model)
+
+        return queryset if connection is None else queryset.using_db(connection)
+
+    @staticmethod
+    def query_key(attribute=None, value=None, tortoise_operator=None) -> tuple:
+        """
+        Returns a normalized representation of a filter, used as part of a query cache key.
+        """
+        if attribute is None:
+            return ()
+
+        if attribute.type == Types.VARIABLE:
+            instances = attribute.value if isinstance(attribute.value, list) else [attribute.value]
+            return ("pk", "in", tuple(x.pk for x in instances))
+
+        operator = "exact" if tortoise_operator is None else tortoise_operator.name.lower()
+        normalized = value.value.pk if hasattr(value.value, "pk") else str(value)
+
+        return (attribute.name.lower(), operator, normalized)
+
+    async def filter_queryset(self, model, attribute=None, value=None, tortoise_operator=None):
+        """
+        Returns a queryset of model instances where the specified attribute meets the
+        condition defined by the optional `tortoise_operator`. If `attribute` is None,
+        every instance will be included.
+        """
+        if attribute is None:
+            return model.value.all()
+
+        if attribute.type == Types.VARIABLE:
+            if attribute.extra_data[0] != model.name:
+                raise Exception(f"'{attribute}' does not contain {model.name} instances")
+
+            instances = attribute.value
+
+            if not isinstance(instances, list):
+                instances = [instances]
+
+            return model.value.filter(pk__in=[x.pk for x in instances])
+
+        casing_name = attribute.name.lower()
+        self.attribute_error(model, casing_name)
+
+        if tortoise_operator is not None:
+            casing_name += f"__{tortoise_operator.name.lower()}"
+
+        new_value = value.value
+
+        if attribute.type == Types.MODEL:
+            new_value = await Utils.get_model(attribute, value)
+
+        return model.value.filter(**{casing_name: new_value})
+
 
 class Global(DexCommand):
     """
     Main methods for DexScript.
     """
 
+    READ_ONLY = {"view", "attributes", "export", "let", "stats"}
+
     async def create(self, ctx, model, identifier):
         """
         Creates a model instance.
@@ -54,7 +250,12 @@ class Global(DexCommand):
         -------------
         CREATE > MODEL > IDENTIFIER
         """
-        await Utils.create_model(model.value, identifier)
+        instance = await Utils.create_model(model.value, identifier)
+
+        changeset = journal.new(model, "CREATE")
+        journal.record_create(changeset, instance.pk)
+        await journal.save(changeset, ctx)
+
         await ctx.send(f"Created `{identifier}` {model.name.lower()}")
 
     async def delete(self, ctx, model, identifier):
@@ -66,9 +267,17 @@ class Global(DexCommand):
         DELETE > MODEL > IDENTIFIER
         """
         fetched_model = await Utils.get_model(model, identifier)
-        
+
+        changeset = journal.new(model, "DELETE")
+        await journal.capture_delete(changeset, model.value.filter(pk=fetched_model.pk))
+
         await fetched_model.delete()
 
+        metrics.query()
+        metrics.rows(1)
+
+        await journal.save(changeset, ctx)
+
         await ctx.send(f"Deleted `{identifier}` {model.name.lower()}")
 
     async def update(self, ctx, model, identifier, attribute, value=None):
@@ -86,15 +295,11 @@ class Global(DexCommand):
         returned_model = await Utils.get_model(model, identifier)
         self.attribute_error(model, attribute_name)
 
-        image_fields = Utils.fetch_fields(
-            model.value,
-            lambda _, field_type: (
-                field_type.__class__.__name__ == "CharField" and field_type.max_length == 200
-            ),
-        )
+        image_fields = Utils.image_fields(model.value)
 
         if value is None and self.shared.attachments and attribute_name in image_fields:
-            image_path = await Utils.save_file(self.shared.attachments.pop(0))
+            attachment = self.shared.attachments.pop(0)
+            image_path = await Utils.save_file(attachment, await self.shared.download(attachment))
             new_value = f"/static/uploads/{image_path}" if STATIC else f"/{image_path}"
 
         if attribute.type == Types.MODEL:
@@ -102,26 +307,117 @@ class Global(DexCommand):
             attribute_model = await Utils.get_model(attribute, value)
             new_value = attribute_model.pk
 
+        changeset = journal.new(model, "UPDATE")
+        journal.record_update(
+            changeset, returned_model.pk, {attribute_name: getattr(returned_model, attribute_name)}
+        )
+
         setattr(returned_model, attribute_name, new_value)
         await returned_model.save(update_fields=[attribute_name])
 
+        metrics.query()
+        metrics.rows(1)
+
+        await journal.save(changeset, ctx)
+
         suffix = "" if value is None else f" to `{value.name}`" 
 
         await ctx.send(f"Updated `{identifier}'s` {attribute}{suffix}")
 
-    async def view(self, ctx, model, identifier, attribute=None):
+    async def view(
+        self,
+        ctx,
+        model,
+        identifier,
+        attribute=None,
+        filter_attribute=None,
+        filter_value=None,
+        tortoise_operator=None,
+    ):
         """
         Displays an attribute of a model instance. If `ATTRIBUTE` is left blank,
         it will display every attribute of that model instance.
 
+        If `IDENTIFIER` is `*`, a table of every instance will be displayed instead, where
+        `ATTRIBUTE` is a comma-separated list of columns. The table can be narrowed down
+        using a filter, similar to `FILTER > VIEW`.
+
         Documentation
         -------------
         VIEW > MODEL > IDENTIFIER > ATTRIBUTE(?)
+        VIEW > MODEL > * > ATTRIBUTE, ...(?) > ATTRIBUTE(?) > VALUE(?) > TORTOISE_OPERATOR(?)
         """
-        returned_model = await Utils.get_model(model, identifier)
+        if identifier.name == "*":
+            string_key = model.extra_data[0]
+            columns = [string_key]
+            selected = {}
+            aliases = {}
+
+            if attribute is not None:
+                for column in attribute.name.lower().split(","):
+                    if column.strip() not in ("", string_key):
+                        columns.append(column.strip())
+
+            for column in columns:
+                field = Utils.get_field(model.value, column)
+
+                if field is None:
+                    raise Exception(
+                        f"'{column}' is not a valid {model.name} attribute\n"
+                        f"Run `ATTRIBUTES > {model.name}` to see a list of "
+                        "all attributes for that model"
+                    )
+
+                aliases[column] = column
+                path = column
+
+                # Related names are selected under a separate alias, since an alias that
+                # matches the foreign key's own name is resolved to the key itself.
+                if field.__class__.__name__ == "ForeignKeyFieldInstance":
+                    related_key = Utils.extract_str_attr(field.related_model)
+
+                    aliases[column] = f"{column}_{related_key}"
+                    path = f"{column}__{related_key}"
+
+                selected[aliases[column]] = path
+
+            queryset = await self.filter_queryset(
+                model, filter_attribute, filter_value, tortoise_operator
+            )
+
+            query_key = self.query_key(filter_attribute, filter_value, tortoise_operator)
+
+            rows = await query_cache.fetch(
+                model.name,
+                ("table", tuple(columns), *query_key),
+                self.read(model, queryset).order_by(string_key).values(**selected),
+                config.cachettl,
+            )
+
+            if rows == []:
+                await ctx.send(f"No {model.name}s found")
+                return
+
+            rows = [{x: row[aliases[x]] for x in columns} for row in rows]
+
+            await Utils.message_list(ctx, Utils.format_table(columns, rows))
+            return
+
+        if filter_attribute is not None:
+            raise Exception(
+                "Filters can only be used when viewing every instance\n"
+                f"Run `VIEW > {model.name} > * > ...` to filter instances"
+            )
+
+        returned_model = await Utils.get_model(
+            model, identifier, self.shared.read_connection(model), cached=True
+        )
+
+        await Utils.refresh_media()
 
         if attribute is None:
             fields = {"content": "```"}
+            images = []
 
             for key, value in vars(returned_model).items():
                 if key.startswith("_"):
@@ -130,7 +426,12 @@ class Global(DexCommand):
                 fields["content"] += f"{key}: {value}\n"
 
                 if isinstance(value, str) and Utils.is_image(value):
-                    fields.setdefault("files", []).append(discord.File(Utils.image_path(value)))
+                    images.append(Utils.image_path(value))
+
+            if images:
+                fields["files"] = await asyncio.gather(
+                    *[FileSystem.discord_file(x) for x in images]
+                )
 
             fields["content"] += "```"
             await ctx.send(**fields)
@@ -142,13 +443,18 @@ class Global(DexCommand):
         new_attribute = getattr(returned_model, attribute_name)
 
         if isinstance(new_attribute, str) and Utils.is_image(new_attribute):
-            await ctx.send(
-                f"```{new_attribute}```", file=discord.File(Utils.image_path(new_attribute))
-            )
+            image_file = await FileSystem.discord_file(Utils.image_path(new_attribute))
+
+            await ctx.send(f"```{new_attribute}```", file=image_file)
             return
 
         if attribute.type == Types.MODEL:
-            new_attribute = await new_attribute.values_list(attribute.extra_data[0], flat=True)
+            related = attribute.value.filter(pk=getattr(returned_model, f"{attribute_name}_id"))
+
+            new_attribute = await self.read(attribute, related).values_list(
+                attribute.extra_data[0], flat=True
+            )
+            metrics.query()
 
         await ctx.send(f"```{new_attribute}```")
 
@@ -180,12 +486,376 @@ class Global(DexCommand):
 
         await Utils.message_list(ctx, fields)
 
+    async def export(self, ctx, model, format, attribute=None, value=None, tortoise_operator=None):
+        """
+        Exports every instance of a model into a compressed CSV or JSON Lines file.
+        Instances are read from the database in chunks and written incrementally, and the
+        export is split into multiple files if it exceeds the upload limit.
+
+        Documentation
+        -------------
+        EXPORT > MODEL > FORMAT > ATTRIBUTE(?) > VALUE(?) > TORTOISE_OPERATOR(?)
+        """
+        CHUNK_SIZE = 1000
+
+        export_format = format.name.lower()
+
+        if export_format not in RowWriter.FORMATS:
+            raise Exception(f"'{format}' is not a valid format ({', '.join(RowWriter.FORMATS)})")
+
+        selected = {}
+        aliases = {}
+        skipped = set()
+
+        for field, field_type in model.value._meta.fields_map.items():
+            match field_type.__class__.__name__:
+                case "ForeignKeyFieldInstance":
+                    string_key = Utils.extract_str_attr(field_type.related_model)
+
+                    # A `values()` key can't share the name of the relation it selects from.
+                    selected[field] = f"{field}__{string_key}"
+                    aliases[field] = f"{field}_{string_key}"
+                    skipped.add(field_type.source_field)
+
+                case "BackwardFKRelation" | "BackwardOneToOneRelation" | "ManyToManyFieldInstance":
+                    continue
+
+                case _:
+                    selected[field] = field
+
+        selected = {key: source for key, source in selected.items() if key not in skipped}
+        aliases = {key: aliases.get(key, key) for key in selected}
+
+        pk_name = model.value._meta.pk_attr
+        queryset = await self.filter_queryset(model, attribute, value, tortoise_operator)
+        queryset = self.read(model, queryset)
+
+        size_limit = getattr(ctx.guild, "filesize_limit", 10 * 1024 * 1024)
+        writer = await FileSystem.run(
+            RowWriter, f"{model.name.lower()}-export", export_format, list(selected), size_limit
+        )
+
+        exported = 0
+        last_pk = None
+
+        try:
+            while True:
+                chunk_queryset = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+
+                rows = await chunk_queryset.order_by(pk_name).limit(CHUNK_SIZE).values(
+                    pk_name,
+                    **{aliases[key]: source for key, source in selected.items() if key != pk_name},
+                )
+                metrics.query()
+
+                if rows == []:
+                    break
+
+                last_pk = rows[-1][pk_name]
+                exported += len(rows)
+
+                await writer.write([{x: row[aliases[x]] for x in selected} for row in rows])
+        finally:
+            await writer.close()
+
+        try:
+            if exported == 0:
+                await ctx.send(f"No {model.name}s found")
+
+            for index, path in enumerate(writer.paths, start=1):
+                suffix = f" (part {index}/{len(writer.paths)})" if len(writer.paths) > 1 else ""
+
+                await ctx.send(
+                    f"Exported `{exported}` {model.name.lower()} instances{suffix}",
+                    file=await FileSystem.discord_file(path),
+                )
+        finally:
+            await FileSystem.remove(writer.directory)
+
+    async def sync(self, ctx, model, prune=None):
+        """
+        Makes a model's instances match an attached JSON, YAML, CSV, or JSON Lines file,
+        only writing the instances and attributes that differ. If `DELETE` is passed,
+        instances missing from the file will be deleted. Changes are displayed and must be
+        confirmed before they are applied.
+
+        Documentation
+        -------------
+        SYNC > MODEL > DELETE(?)
+        """
+        if not self.shared.attachments:
+            raise Exception("You must attach a file containing the desired instances")
+
+        download = await self.shared.download(self.shared.attachments.pop(0))
+
+        try:
+            rows = await FileSystem.run(FileSystem.load_rows, download.path)
+        finally:
+            await FileSystem.remove(download.path)
+
+        desired, errors = await Utils.convert_rows(model, rows)
+
+        string_key = model.extra_data[0]
+        seen = {}
+
+        for line, row in desired:
+            key = str(row[string_key])
+
+            if key in seen:
+                errors.append(f"Line {line}: '{key}' is already defined on line {seen[key]}")
+
+            seen[key] = line
+
+        if errors:
+            await Utils.message_list(ctx, errors)
+            raise Exception(f"The file contains `{len(errors)}` invalid rows")
+
+        pk_name = model.value._meta.pk_attr
+        columns = {column for _, row in desired for column in row} - {string_key, pk_name}
+
+        current = await model.value.all().values(pk_name, string_key, *columns)
+        metrics.query()
+
+        current = {str(row[string_key]): row for row in current}
+
+        creates, updates, changes = [], {}, []
+
+        for _, row in desired:
+            key = str(row[string_key])
+            existing = current.get(key)
+
+            if existing is None:
+                creates.append(row)
+                changes.append(f"+ {key}")
+                continue
+
+            changed = {
+                column: value
+                for column, value in row.items()
+                if not Utils.same_value(
+                    Utils.get_field(model.value, column), existing[column], value
+                )
+            }
+
+            if not changed:
+                continue
+
+            updates[existing[pk_name]] = changed
+
+            for column, value in changed.items():
+                changes.append(f"~ {key}: {column} {existing[column]} -> {value}")
+
+        deletes = []
+
+        if prune is not None and (prune.value is True or prune.name.lower() == "delete"):
+            desired_keys = {str(row[string_key]) for _, row in desired}
+
+            for key, row in current.items():
+                if key not in desired_keys:
+                    deletes.append(row[pk_name])
+                    changes.append(f"- {key}")
+
+        if changes == []:
+            await ctx.send(f"`{model.name}` instances are already in sync")
+            return
+
+        changes.insert(
+            0,
+            f"{model.name.upper()} CHANGES ({len(creates)} created, "
+            f"{len(updates)} updated, {len(deletes)} deleted):\n",
+        )
+
+        await Utils.message_list(ctx, changes)
+        await ctx.send("Type `confirm` to apply these changes...")
+
+        try:
+            message = await self.bot.wait_for(
+                "message",
+                check=lambda m: m.author == ctx.author and m.channel == ctx.channel,
+                timeout=30,
+            )
+        except asyncio.TimeoutError:
+            await ctx.send("Sync has timed out.")
+            return
+
+        if message.content.lower() != "confirm":
+            await ctx.send("Sync has been cancelled.")
+            return
+
+        changeset = journal.new(model, "SYNC")
+
+        if deletes:
+            await journal.capture_delete(changeset, model.value.filter(pk__in=deletes))
+
+        if creates:
+            defaults = await Utils.default_fields(model.value)
+
+            await model.value.bulk_create([model.value(**{**defaults, **x}) for x in creates])
+            metrics.query()
+
+            # None of these identifiers existed before, so every match was just created.
+            await journal.capture_create(
+                changeset,
+                model.value.filter(**{f"{string_key}__in": [x[string_key] for x in creates]}),
+            )
+
+        if updates:
+            groups = {}
+
+            for instance in await model.value.filter(pk__in=list(updates)):
+                journal.record_update(
+                    changeset, instance.pk, {x: getattr(instance, x) for x in updates[instance.pk]}
+                )
+
+                for column, value in updates[instance.pk].items():
+                    setattr(instance, column, value)
+
+                groups.setdefault(frozenset(updates[instance.pk]), []).append(instance)
+
+            metrics.query()
+
+            for fields, instances in groups.items():
+                await model.value.bulk_update(instances, fields=list(fields))
+                metrics.query()
+
+        if deletes:
+            await model.value.filter(pk__in=deletes).delete()
+            metrics.query()
+
+        metrics.rows(len(creates) + len(updates) + len(deletes))
+
+        await journal.save(changeset, ctx)
+
+        await ctx.send(
+            f"Synced `{model.name}` instances: `{len(creates)}` created, "
+            f"`{len(updates)}` updated, `{len(deletes)}` deleted"
+        )
+
+    async def undo(self, ctx, changeset_id=None):
+        """
+        Reverts the changes made by a mutating command. If `CHANGESET` is left blank, the
+        latest changes will be reverted. Passing `LIST` will display every stored changeset.
+
+        Documentation
+        -------------
+        UNDO > CHANGESET(?)
+        """
+        if changeset_id is not None and changeset_id.name.lower() == "list":
+            changesets = [
+                f"{x.id} | {x.command} > {x.model.upper()} | {len(x)} rows | "
+                f"{datetime.fromtimestamp(x.timestamp):%Y-%m-%d %H:%M:%S}"
+                for x in await journal.list()
+            ]
+
+            if changesets == []:
+                await ctx.send("There are no changes to undo.")
+                return
+
+            await Utils.message_list(ctx, changesets)
+            return
+
+        changeset = await journal.load(None if changeset_id is None else changeset_id.name)
+
+        if changeset is None:
+            raise Exception("There are no changes to undo.")
+
+        await journal.undo(changeset)
+
+        await ctx.send(
+            f"Reverted `{changeset.command} > {changeset.model.upper()}` "
+            f"({len(changeset)} rows, changeset `{changeset.id}`)"
+        )
+
+    async def let(
+        self, ctx, name, value, attribute=None, filter_value=None, tortoise_operator=None
+    ):
+        """
+        Stores a value, a model instance, or a list of filtered model instances inside of a
+        variable, which can be referenced as `$NAME` by every line that follows. Model
+        instances are only fetched once, no matter how many times the variable is used.
+
+        Lists of model instances can be used in place of a filter attribute, such as the
+        filter `ATTRIBUTE` after the columns of `VIEW > MODEL > *`, the `ATTRIBUTE` of
+        `EXPORT`, or the `FILTER_ATTRIBUTE` of `EACH > UPDATE`. The value and operator that
+        would follow it are left out.
+
+        Documentation
+        -------------
+        LET > NAME > VALUE
+        LET > NAME > MODEL > IDENTIFIER
+        LET > NAME > MODEL > ATTRIBUTE > VALUE > TORTOISE_OPERATOR(?)
+        """
+        variable_name = name.name.lower()
+
+        if attribute is None:
+            self.shared.variables[variable_name] = value
+
+            await ctx.send(f"Stored `{value}` in `${variable_name}`")
+            return
+
+        if value.type != Types.MODEL:
+            raise Exception(f"'{value}' is not a valid model")
+
+        string_key = value.extra_data[0]
+
+        if filter_value is None:
+            instance = await Utils.get_model(value, attribute, self.shared.read_connection(value))
+
+            self.shared.variables[variable_name] = replace(
+                attribute,
+                name=str(getattr(instance, string_key)),
+                type=Types.VARIABLE,
+                value=instance,
+                extra_data=(value.name,),
+            )
+
+            await ctx.send(f"Stored `{attribute}` {value.name.lower()} in `${variable_name}`")
+            return
+
+        queryset = await self.filter_queryset(value, attribute, filter_value, tortoise_operator)
+        instances = await self.read(value, queryset)
+
+        metrics.query()
+
+        self.shared.variables[variable_name] = replace(
+            name,
+            name=f"${variable_name}",
+            type=Types.VARIABLE,
+            value=instances,
+            extra_data=(value.name,),
+        )
+
+        await ctx.send(f"Stored {len(instances)} {value.name.lower()}s in `${variable_name}`")
+
+    async def stats(self, ctx, action=None):
+        """
+        Displays command counters, latencies, and query cache statistics recorded since the
+        bot started. Passing `RESET` will clear every recorded metric.
+
+        Documentation
+        -------------
+        STATS > RESET(?)
+        """
+        if action is not None and action.name.lower() == "reset":
+            metrics.reset()
+            query_cache.reset()
+
+            await ctx.send("Reset all DexScript metrics")
+            return
+
+        if config.metricspath:
+            await FileSystem.run(metrics.export, config.metricspath)
+
+        await Utils.message_list(ctx, [*metrics.summary(), f"\n{query_cache.summary()}"])
+
 
 class Filter(DexCommand):
     """
     Filter commands used for mass updating, deleting, and viewing models.
     """
 
+    READ_ONLY = {"view"}
+
     async def update(self, ctx, model, attribute, old_value, new_value, tortoise_operator=None):
         """
         Updates all instances of a model to the specified value where the specified attribute
@@ -204,11 +874,24 @@ class Filter(DexCommand):
 
         value_old, value_new = old_value.value, new_value.value
 
+        column = attribute.name.lower()
+
         if attribute.type == Types.MODEL:
-            value_old = await Utils.get_model(attribute, value_old)
-            value_new = await Utils.get_model(attribute, value_new)
+            value_old = await Utils.get_model(attribute, old_value)
+            value_new = await Utils.get_model(attribute, new_value)
+            column += "_id"
+
+        queryset = model.value.filter(**{casing_name: value_old})
+
+        changeset = journal.new(model, "FILTER > UPDATE")
+        await journal.capture_update(changeset, queryset, column)
+
+        updated = await queryset.update(**{casing_name: value_new})
 
-        await model.value.filter(**{casing_name: value_old}).update(**{casing_name: value_new})
+        metrics.query()
+        metrics.rows(updated)
+
+        await journal.save(changeset, ctx)
 
         await ctx.send(
             f"Updated all `{model.name}` instances from a `{attribute}` "
@@ -234,9 +917,19 @@ class Filter(DexCommand):
         new_value = value.value
 
         if attribute.type == Types.MODEL:
-            new_value = await Utils.get_model(attribute, new_value)
+            new_value = await Utils.get_model(attribute, value)
+
+        queryset = model.value.filter(**{casing_name: new_value})
+
+        changeset = journal.new(model, "FILTER > DELETE")
+        await journal.capture_delete(changeset, queryset)
+
+        deleted = await queryset.delete()
 
-        await model.value.filter(**{casing_name: new_value}).delete()
+        metrics.query()
+        metrics.rows(deleted)
+
+        await journal.save(changeset, ctx)
 
         await ctx.send(
             f"Deleted all `{model.name}` instances with a `{attribute}` value of `{value}`"
@@ -261,10 +954,15 @@ class Filter(DexCommand):
         new_value = value.value
 
         if attribute.type == Types.MODEL:
-            new_value = await Utils.get_model(attribute, new_value)
+            new_value = await Utils.get_model(attribute, value)
+
+        queryset = self.read(model, model.value.filter(**{casing_name: new_value}))
 
-        instances = await model.value.filter(**{casing_name: new_value}).values_list(
-            model.extra_data[0], flat=True
+        instances = await query_cache.fetch(
+            model.name,
+            ("filter", *self.query_key(attribute, value, tortoise_operator)),
+            queryset.values_list(model.extra_data[0], flat=True),
+            config.cachettl,
         )
 
         if instances == []:
@@ -276,13 +974,311 @@ class Filter(DexCommand):
         await Utils.message_list(ctx, instances)
 
 
+class Each(DexCommand):
+    """
+    Commands that apply an expression to every instance returned by a filter.
+    """
+
+    BATCH_SIZE = 500
+
+    async def update(
+        self,
+        ctx,
+        model,
+        attribute,
+        expression,
+        filter_attribute=None,
+        filter_value=None,
+        tortoise_operator=None,
+    ):
+        """
+        Updates an attribute of every instance of a model to the result of an expression,
+        such as `RARITY * 1.1`, where the filter attribute meets the condition defined by the
+        optional `TORTOISE_OPERATOR` argument. If `FILTER_ATTRIBUTE` is left blank, every
+        instance will be updated.
+
+        Arithmetic over numeric attributes is applied using a single query, while expressions
+        that use functions or other attributes are evaluated in batches.
+
+        Documentation
+        -------------
+        EACH > UPDATE > MODEL > ATTRIBUTE > EXPRESSION > FILTER_ATTRIBUTE(?) > FILTER_VALUE(?)
+        > TORTOISE_OPERATOR(?)
+        """
+        attribute_name = attribute.name.lower()
+        field_type = Utils.get_field(model.value, attribute_name)
+
+        if field_type is None or field_type.__class__.__name__ in RELATION_FIELDS:
+            raise Exception(
+                f"'{attribute}' is not a valid {model.name} attribute\n"
+                f"Run `ATTRIBUTES > {model.name}` to see a list of "
+                "all attributes for that model"
+            )
+
+        compiled = Expression(expression.name, model.value)
+
+        queryset = await self.filter_queryset(
+            model, filter_attribute, filter_value, tortoise_operator
+        )
+
+        changeset = journal.new(model, "EACH > UPDATE")
+
+        set_based = compiled.columns == set() or (
+            compiled.set_based
+            and field_type.__class__.__name__ in NUMERIC_FIELDS
+            and compiled.fits(field_type)
+        )
+
+        if set_based:
+            if compiled.columns == set():
+                new_value = compiled.value(None, field_type)
+            else:
+                new_value = compiled.query()
+
+            await journal.capture_update(changeset, queryset, attribute_name)
+
+            updated = await queryset.update(**{attribute_name: new_value})
+
+            metrics.query()
+            metrics.rows(updated)
+
+            await journal.save(changeset, ctx)
+
+            await ctx.send(
+                f"Updated the `{attribute}` of {updated} {model.name} instances to `{expression}`"
+            )
+            return
+
+        pk_name = model.value._meta.pk_attr
+        string_key = model.extra_data[0]
+
+        updated = 0
+        last_pk = None
+
+        # Every batch is written in one transaction, so a row that fails to evaluate
+        # doesn't leave the batches before it applied.
+        async with in_transaction(model.value._meta.default_connection):
+            while True:
+                chunk_queryset = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+
+                instances = await chunk_queryset.order_by(pk_name).limit(self.BATCH_SIZE)
+                metrics.query()
+
+                if instances == []:
+                    break
+
+                last_pk = instances[-1].pk
+                new_values = []
+
+                for instance in instances:
+                    try:
+                        new_values.append(compiled.value(instance, field_type))
+                    except Exception as error:
+                        raise Exception(
+                            f"Could not evaluate `{expression}` for "
+                            f"`{getattr(instance, string_key)}`: {error}"
+                        )
+
+                for instance, new_value in zip(instances, new_values):
+                    journal.record_update(
+                        changeset, instance.pk, {attribute_name: getattr(instance, attribute_name)}
+                    )
+
+                    setattr(instance, attribute_name, new_value)
+
+                await model.value.bulk_update(instances, fields=[attribute_name])
+
+                metrics.query()
+                metrics.rows(len(instances))
+
+                updated += len(instances)
+
+        await journal.save(changeset, ctx)
+
+        await ctx.send(
+            f"Updated the `{attribute}` of {updated} {model.name} instances to `{expression}`"
+        )
+
+
+class Job(DexCommand):
+    """
+    Commands for running DexScript code in the background.
+    """
+
+    READ_ONLY = {"start", "status", "cancel"}
+
+    async def start(self, ctx, code):
+        """
+        Runs DexScript code in the background, where `CODE` is wrapped in quotes and may
+        span multiple lines. The result will be sent in this channel once the job finishes.
+
+        Documentation
+        -------------
+        JOB > START > CODE
+        """
+        # The job reports back after this script's output buffer has been flushed.
+        job = job_manager.submit(
+            ctx.original, self.bot.original, code.name, config.jobconcurrency
+        )
+
+        await ctx.send(f"Started job `#{job.id}`")
+
+    async def status(self, ctx, job_id=None):
+        """
+        Displays the status and progress of a job. If `JOB_ID` is left blank, every
+        recent job will be displayed.
+
+        Documentation
+        -------------
+        JOB > STATUS > JOB_ID(?)
+        """
+        if job_id is not None:
+            await ctx.send(f"```{job_manager.get(job_id.name).format()}```")
+            return
+
+        jobs = [x.format() for x in reversed(job_manager.jobs.values())]
+
+        if jobs == []:
+            await ctx.send("There are no jobs.")
+            return
+
+        await Utils.message_list(ctx, jobs)
+
+    async def cancel(self, ctx, job_id):
+        """
+        Cancels a queued or running job. Lines that have already finished are not reverted.
+
+        Documentation
+        -------------
+        JOB > CANCEL > JOB_ID
+        """
+        job = job_manager.cancel(job_id.name)
+
+        await ctx.send(f"Cancelling job `#{job.id}`")
+
+
+class Schedule(DexCommand):
+    """
+    Commands for running DexScript code automatically, such as during off-peak hours.
+    """
+
+    READ_ONLY = {"add", "remove", "list", "history"}
+
+    async def add(self, ctx, name, when, code=None, jitter=None):
+        """
+        Schedules DexScript code to run as a background job in this channel. `WHEN` is
+        either an interval, such as `6h`, or a cron expression, such as `0 4 * * *`.
+        `JITTER` delays each run by a random duration up to the one specified. If `CODE` is
+        left blank, you will be prompted to send it.
+
+        Documentation
+        -------------
+        SCHEDULE > ADD > NAME > WHEN > CODE(?) > JITTER(?)
+        """
+        jitter_seconds = 0
+
+        if jitter is not None:
+            jitter_seconds = parse_duration(jitter.name)
+
+            if jitter_seconds is None:
+                raise Exception(f"'{jitter}' is not a valid duration")
+
+        schedule = ScheduledScript(name.name, "", when.name, ctx.channel.id, jitter_seconds)
+        schedule.validate()
+        schedule.schedule_next()
+
+        if code is None:
+            await ctx.send("Please send the DexScript code below...")
+
+            try:
+                message = await self.bot.wait_for(
+                    "message",
+                    check=lambda m: m.author == ctx.author and m.channel == ctx.channel,
+                    timeout=60,
+                )
+            except asyncio.TimeoutError:
+                await ctx.send("Scheduling has timed out.")
+                return
+
+            schedule.code = Utils.remove_code_markdown(message.content)
+        else:
+            schedule.code = code.name
+
+        await scheduler.add(schedule)
+
+        await ctx.send(
+            f"Scheduled `{name}`, which will first run "
+            f"<t:{int(schedule.next_run)}:R> (<t:{int(schedule.next_run)}:f>)"
+        )
+
+    async def remove(self, ctx, name):
+        """
+        Removes a scheduled script.
+
+        Documentation
+        -------------
+        SCHEDULE > REMOVE > NAME
+        """
+        await scheduler.remove(name.name)
+
+        await ctx.send(f"Removed `{name}` from the schedule")
+
+    async def list(self, ctx):
+        """
+        Lists every scheduled script.
+
+        Documentation
+        -------------
+        SCHEDULE > LIST
+        """
+        schedules = [
+            f"{x.name} | {x.when} | NEXT RUN "
+            f"{datetime.fromtimestamp(x.next_run):%Y-%m-%d %H:%M:%S} "
+            f"| {x.history[-1]['status'].upper() if x.history else 'NEVER RAN'}"
+            for x in scheduler.schedules.values()
+        ]
+
+        if schedules == []:
+            await ctx.send("There are no scheduled scripts.")
+            return
+
+        await Utils.message_list(ctx, schedules)
+
+    async def history(self, ctx, name):
+        """
+        Displays the most recent runs of a scheduled script.
+
+        Documentation
+        -------------
+        SCHEDULE > HISTORY > NAME
+        """
+        if name.name not in scheduler.schedules:
+            raise Exception(f"`{name}` is not scheduled")
+
+        runs = [
+            f"#{x['job']} | {x['status'].upper()} | "
+            f"{datetime.fromtimestamp(x['started'] or x['finished']):%Y-%m-%d %H:%M:%S} | "
+            f"{(x['finished'] - (x['started'] or x['finished'])):.1f}s"
+            + (f"\n  ERROR: {x['error']}" if x["error"] else "")
+            for x in reversed(scheduler.schedules[name.name].history)
+        ]
+
+        if runs == []:
+            await ctx.send(f"`{name}` hasn't run yet.")
+            return
+
+        await Utils.message_list(ctx, runs)
+
+
 class Eval(DexCommand):
     """
     Commands for managing eval presets.
     """
 
+    READ_ONLY = {"save", "remove", "list"}
+
     def __loaded__(self):
-        os.makedirs("eval_presets", exist_ok=True)
+        os.makedirs(preset_store.path, exist_ok=True)
 
     async def save(self, ctx, name):
         """
@@ -299,7 +1295,7 @@ class Eval(DexCommand):
                 f"`{name}` exceeds the {NAME_LIMIT}-character limit ({len(name)} > {NAME_LIMIT})"
             )
 
-        if os.path.isfile(f"eval_presets/{name}.py"):
+        if await preset_store.exists(name.name):
             raise Exception(f"`{name}` already exists.")
 
         await ctx.send("Please send the eval command below...")
@@ -314,8 +1310,9 @@ class Eval(DexCommand):
             await ctx.send("Eval preset saving has timed out.")
             return
 
-        with open(f"eval_presets/{name}.py", "w") as file:
-            file.write(Utils.remove_code_markdown(message.content))
+        await preset_store.save(
+            name.name, Utils.remove_code_markdown(message.content), str(ctx.author)
+        )
 
         await ctx.send(f"`{name}` eval preset has been saved!")
 
@@ -327,38 +1324,69 @@ class Eval(DexCommand):
         -------------
         EVAL > REMOVE > NAME
         """
-        if not os.path.isfile(f"eval_presets/{name}.py"):
+        if not await preset_store.exists(name.name):
             raise Exception(f"`{name}` does not exists")
 
-        os.remove(f"eval_presets/{name}.py")
+        await preset_store.remove(name.name)
 
         await ctx.send(f"Removed `{name}` preset.")
 
     async def list(self, ctx):
-        if os.listdir("eval_presets") == []:
+        presets = await preset_store.names()
+
+        if presets == []:
             await ctx.send("You have no eval presets saved.")
             return
 
-        await Utils.message_list(ctx, os.listdir("eval_presets"))
+        await Utils.message_list(ctx, [x.format() for x in presets])
 
-    async def run(self, ctx, name):  # TODO: Allow args to be passed through `run`.
+    async def run(self, ctx, name, *args):
         """
-        Runs an eval preset.
+        Runs an eval preset. Any arguments after the name are passed to the preset as `args`.
 
         Documentation
         -------------
-        EVAL > RUN > NAME
+        EVAL > RUN > NAME > ARGS...
         """
-        if not os.path.isfile(f"eval_presets/{name}.py"):
-            raise Exception(f"`{name}` does not exists")
+        env = {}
+        eval_command = self.bot.get_command("eval")
+
+        # Presets can use everything the `eval` command imports.
+        if eval_command is not None:
+            env.update(eval_command.callback.__globals__)
+
+        env.update(
+            {
+                "bot": self.bot.original,
+                "ctx": ctx.original,
+                "channel": ctx.channel,
+                "author": ctx.author,
+                "guild": ctx.guild,
+                "message": ctx.message,
+                "args": tuple(x.value for x in args),
+                "__name__": "__main__",
+            }
+        )
 
-        with open(f"eval_presets/{name}.py", "r") as file:
-            try:
-                await ctx.invoke(self.bot.get_command("eval"), body=file.read())
-            except Exception as error:
-                raise Exception(error)
-            else:
-                await ctx.message.add_reaction("✅")
+        # Presets send messages directly, so earlier output has to be sent first.
+        await ctx.flush()
+
+        stdout = io.StringIO()
+        result = None
+
+        try:
+            result = await preset_store.run(name.name, env, stdout)
+        finally:
+            # Output printed before an exception is sent along with the error.
+            output = stdout.getvalue()
+
+            if result is not None:
+                output += f"{result}"
+
+            if output:
+                await ctx.send(f"```py\n{output}\n```")
+
+        await ctx.message.add_reaction("✅")
 
 
 class File(DexCommand):
@@ -366,6 +1394,8 @@ class File(DexCommand):
     Commands for managing and modifying the bot's internal filesystem.
     """
 
+    READ_ONLY = {"read", "listdir"}
+
     async def read(self, ctx, file_path):
         """
         Sends a file based on the specified file path.
@@ -374,21 +1404,20 @@ class File(DexCommand):
         -------------
         FILE > READ > FILE_PATH
         """
-        await ctx.send(file=discord.File(file_path.name))
+        await ctx.send(file=await FileSystem.discord_file(file_path.name))
 
     async def write(self, ctx, file_path):
         """
-        Writes to a file using the attached file's contents.
+        Writes to a file using the attached file's contents. The attachment is streamed to
+        disk and replaces the file once the download finishes.
 
         Documentation
         -------------
         FILE > WRITE > FILE_PATH
         """
-        new_file = ctx.message.attachments[0]
+        attachment = self.shared.attachments.pop(0)
 
-        with open(file_path.name, "w") as opened_file:
-            contents = await new_file.read()
-            opened_file.write(contents.decode("utf-8"))
+        await FileSystem.move((await self.shared.download(attachment)).path, file_path.name)
 
         await ctx.send(f"Wrote to `{file_path}`")
 
@@ -400,11 +1429,10 @@ class File(DexCommand):
         -------------
         FILE > CLEAR > FILE_PATH
         """
-        if not os.path.isfile(file_path):
+        if not await FileSystem.isfile(file_path.name):
             raise Exception(f"'{file_path}' does not exist")
 
-        with open(file_path.name, "w") as _:
-            pass
+        await FileSystem.write(file_path.name, "")
 
         await ctx.send(f"Cleared `{file_path}`")
 
@@ -418,7 +1446,7 @@ class File(DexCommand):
         """
         path = file_path.name if file_path is not None else None
 
-        await Utils.message_list(ctx, os.listdir(path))
+        await Utils.message_list(ctx, await FileSystem.listdir(path))
 
     async def delete(self, ctx, file_path):
         """
@@ -428,23 +1456,218 @@ class File(DexCommand):
         -------------
         FILE > DELETE > FILE_PATH
         """
-        is_dir = os.path.isdir(file_path.name)
+        is_dir = await FileSystem.remove(file_path.name)
 
         file_type = "directory" if is_dir else "file"
 
-        if is_dir:
-            shutil.rmtree(file_path.name)
-        else:
-            os.remove(file_path.name)
-
         await ctx.send(f"Deleted `{file_path}` {file_type}")
 
 
+class Import(DexCommand):
+    """
+    Commands for importing data into models in bulk.
+    """
+
+    BATCH_SIZE = 16
+    CHUNK_SIZE = 500
+
+    async def data(self, ctx, model):
+        """
+        Creates or updates model instances in bulk using an attached CSV or JSON Lines file.
+        Rows are matched to existing instances using the model's identifier column, and
+        rows without a match are created.
+
+        Documentation
+        -------------
+        IMPORT > DATA > MODEL
+        """
+        if not self.shared.attachments:
+            raise Exception("You must attach a CSV or JSON Lines file to import data from")
+
+        download = await self.shared.download(self.shared.attachments.pop(0))
+
+        string_key = model.extra_data[0]
+
+        defaults = None
+        created, updated, errors = 0, 0, []
+
+        changeset = journal.new(model, "IMPORT > DATA")
+        reader = await FileSystem.run(RowReader, download.path)
+
+        try:
+            while rows := await reader.read(self.CHUNK_SIZE):
+                values, row_errors = await Utils.convert_rows(model, rows)
+                errors.extend(row_errors)
+
+                # Rows with the same identifier are merged, keeping the last one.
+                values = list({str(x[string_key]): (i, x) for i, x in values}.values())
+
+                if values == []:
+                    continue
+
+                existing = await model.value.filter(
+                    **{f"{string_key}__in": [x[string_key] for _, x in values]}
+                )
+                metrics.query()
+
+                existing = {str(getattr(x, string_key)): x for x in existing}
+
+                to_create, to_update, update_fields = [], [], set()
+                old_values = []
+
+                for _, converted in values:
+                    instance = existing.get(str(converted[string_key]))
+
+                    if instance is None:
+                        if defaults is None:
+                            defaults = await Utils.default_fields(model.value)
+
+                        to_create.append(model.value(**{**defaults, **converted}))
+                        continue
+
+                    old_row = {x: getattr(instance, x) for x in converted if x != string_key}
+                    old_values.append((instance.pk, old_row))
+
+                    for key, value in converted.items():
+                        setattr(instance, key, value)
+
+                    update_fields.update(converted)
+                    to_update.append(instance)
+
+                update_fields.discard(string_key)
+
+                # Each chunk is written atomically, so a failed update can't leave behind
+                # created rows that were never journaled.
+                try:
+                    async with in_transaction(model.value._meta.default_connection):
+                        if to_create:
+                            await model.value.bulk_create(to_create)
+                            metrics.query()
+
+                        if to_update and update_fields:
+                            await model.value.bulk_update(to_update, fields=list(update_fields))
+                            metrics.query()
+
+                        # None of these identifiers existed before, so every match was just
+                        # created.
+                        if to_create:
+                            keys = [getattr(x, string_key) for x in to_create]
+
+                            await journal.capture_create(
+                                changeset, model.value.filter(**{f"{string_key}__in": keys})
+                            )
+                except Exception as error:
+                    errors.append(f"Lines {rows[0][0]}-{rows[-1][0]}: {error}")
+                    continue
+
+                if update_fields:
+                    for pk, row in old_values:
+                        journal.record_update(changeset, pk, row)
+
+                created += len(to_create)
+                updated += len(to_update) if update_fields else 0
+        finally:
+            await reader.close()
+            await FileSystem.remove(download.path)
+            await journal.save(changeset, ctx)
+
+        metrics.rows(created + updated)
+
+        await ctx.send(
+            f"Imported `{model.name}` data: `{created}` created, `{updated}` updated, "
+            f"`{len(errors)}` errors"
+        )
+
+        if errors:
+            await Utils.message_list(ctx, errors)
+
+    async def images(self, ctx, model, field):
+        """
+        Updates an image field for many model instances at once using an attached ZIP file.
+        Each image is matched to a model instance by its filename.
+
+        Documentation
+        -------------
+        IMPORT > IMAGES > MODEL > FIELD
+        """
+        field_name = field.name.lower()
+
+        if field_name not in Utils.image_fields(model.value):
+            raise Exception(f"'{field_name}' is not an image field of {model.name}")
+
+        if not self.shared.attachments:
+            raise Exception("You must attach a ZIP file to import images from")
+
+        attachment = self.shared.attachments.pop(0)
+        archive_path = (await self.shared.download(attachment)).path
+
+        changeset = journal.new(model, "IMPORT > IMAGES")
+
+        try:
+            entries = await FileSystem.run(FileSystem.archive_entries, archive_path)
+
+            instances = await model.value.all()
+            metrics.query()
+
+            lookup = {str(getattr(x, model.extra_data[0])).lower(): x for x in instances}
+
+            matched = [(entry, lookup[stem]) for stem, entry in entries.items() if stem in lookup]
+            errors = [
+                f"{entry}: no matching {model.name.lower()}"
+                for stem, entry in entries.items()
+                if stem not in lookup
+            ]
+            updated = []
+
+            for index in range(0, len(matched), self.BATCH_SIZE):
+                batch = matched[index : index + self.BATCH_SIZE]
+
+                contents = await FileSystem.run(
+                    FileSystem.read_archive, archive_path, [entry for entry, _ in batch]
+                )
+                results = await asyncio.gather(
+                    *[FileSystem.run_process(normalize_image, x) for x in contents],
+                    return_exceptions=True,
+                )
+
+                for (entry, instance), result in zip(batch, results):
+                    if isinstance(result, Exception):
+                        errors.append(f"{entry}: {result}")
+                        continue
+
+                    image_path = await media_store.store_bytes(*result)
+                    new_value = f"/static/uploads/{image_path}" if STATIC else f"/{image_path}"
+
+                    journal.record_update(
+                        changeset, instance.pk, {field_name: getattr(instance, field_name)}
+                    )
+
+                    setattr(instance, field_name, new_value)
+                    updated.append(instance)
+        finally:
+            await FileSystem.remove(archive_path)
+
+        if updated:
+            await model.value.bulk_update(updated, fields=[field_name])
+
+            metrics.query()
+            metrics.rows(len(updated))
+
+            await journal.save(changeset, ctx)
+
+        await ctx.send(f"Imported `{len(updated)}` {model.name.lower()} images into `{field}`")
+
+        if errors:
+            await Utils.message_list(ctx, errors)
+
+
 class Template(DexCommand):
     """
     Template commands used to assist with DexScript commands.
     """
 
+    READ_ONLY = {"create"}
+
     # TODO: Softcode model creation template.
     async def create(self, ctx, model, argument="..."):
         """
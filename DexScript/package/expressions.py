@@ -0,0 +1,229 @@
+import ast
+import math
+import operator
+from decimal import Decimal
+
+from tortoise.expressions import F
+
+from .utils import Utils
+
+INTEGER_FIELDS = ("IntField", "SmallIntField", "BigIntField")
+NUMERIC_FIELDS = ("IntField", "SmallIntField", "BigIntField", "FloatField", "DecimalField")
+RELATION_FIELDS = (
+    "ForeignKeyFieldInstance",
+    "BackwardFKRelation",
+    "BackwardOneToOneRelation",
+    "ManyToManyFieldInstance",
+    "OneToOneFieldInstance",
+)
+
+OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+}
+
+UNARY_OPERATORS = {
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
+CONSTANTS = {
+    "true": True,
+    "false": False,
+    "none": None,
+}
+
+FUNCTIONS = {
+    "abs": abs,
+    "float": float,
+    "int": int,
+    "max": max,
+    "min": min,
+    "round": round,
+    "str": str,
+}
+
+
+class Expression:
+    """
+    A restricted expression that computes a new value from the fields of a model instance,
+    such as `rarity * 1.1`. Arithmetic over numeric fields is compiled into a Tortoise `F`
+    expression so it can run as a single UPDATE; everything else is evaluated per row.
+    """
+
+    def __init__(self, source: str, model):
+        self.source = source
+        self.fields_map = model._meta.fields_map
+        self.columns = set()
+
+        try:
+            self.tree = ast.parse(source.strip(), mode="eval").body
+        except SyntaxError:
+            raise Exception(f"'{source}' is not a valid expression")
+
+        self.set_based = self._validate(self.tree)
+
+    def _validate(self, node) -> bool:
+        """
+        Validates an expression node, returning whether it can be compiled into SQL.
+        """
+        match node:
+            case ast.Constant(value=value):
+                return node is self.tree or type(value) in (int, float)
+
+            case ast.Name(id=name) if name.lower() in CONSTANTS:
+                return node is self.tree
+
+            case ast.Name(id=name):
+                name = name.lower()
+                field_type = self.fields_map.get(name)
+
+                if field_type is None or field_type.__class__.__name__ in RELATION_FIELDS:
+                    raise Exception(f"'{name}' is not a valid attribute in `{self.source}`")
+
+                self.columns.add(name)
+
+                return field_type.__class__.__name__ in NUMERIC_FIELDS
+
+            case ast.BinOp(left=left, op=op, right=right) if type(op) in OPERATORS:
+                return self._validate(left) & self._validate(right)
+
+            case ast.UnaryOp(op=op, operand=operand) if type(op) in UNARY_OPERATORS:
+                return self._validate(operand)
+
+            case ast.Call(func=ast.Name(id=name), args=args, keywords=[]) if (
+                name.lower() in FUNCTIONS
+            ):
+                for argument in args:
+                    self._validate(argument)
+
+                return False
+
+        raise Exception(f"'{ast.unparse(node)}' is not supported in `{self.source}`")
+
+    def _sql_type(self, node) -> type | None:
+        match node:
+            case ast.Constant(value=value):
+                return type(value)
+
+            case ast.Name(id=name):
+                field_type = self.fields_map[name.lower()]
+                return int if field_type.__class__.__name__ in INTEGER_FIELDS else float
+
+            case ast.BinOp(left=left, op=op, right=right):
+                left, right = self._sql_type(left), self._sql_type(right)
+
+                if left is None or right is None:
+                    return None
+
+                # SQL truncates the division of two integers, unlike Python.
+                if isinstance(op, ast.Div):
+                    return None if left is int and right is int else float
+
+                return int if left is int and right is int else float
+
+            case ast.UnaryOp(operand=operand):
+                return self._sql_type(operand)
+
+        return None
+
+    def fits(self, field_type) -> bool:
+        """
+        Returns whether the compiled query computes the same value Python would, in a type
+        the field can store. Integer fields only accept integer arithmetic, since the
+        database would otherwise store or truncate fractional results instead of rounding.
+
+        Parameters
+        ----------
+        field_type: Field
+            The field the result will be stored in.
+        """
+        result_type = self._sql_type(self.tree)
+
+        if result_type is None:
+            return False
+
+        return result_type is int or field_type.__class__.__name__ not in INTEGER_FIELDS
+
+    def query(self, node=None):
+        """
+        Returns the expression as a value that can be passed to `QuerySet.update`.
+        """
+        node = self.tree if node is None else node
+
+        match node:
+            case ast.Constant(value=value):
+                return value
+
+            case ast.Name(id=name) if name.lower() in CONSTANTS:
+                return CONSTANTS[name.lower()]
+
+            case ast.Name(id=name):
+                return F(name.lower())
+
+            case ast.BinOp(left=left, op=op, right=right):
+                return OPERATORS[type(op)](self.query(left), self.query(right))
+
+            case ast.UnaryOp(op=ast.USub(), operand=operand):
+                return self.query(operand) * -1
+
+            case ast.UnaryOp(operand=operand):
+                return self.query(operand)
+
+    def evaluate(self, instance, node=None):
+        """
+        Evaluates the expression using the field values of a model instance.
+
+        Parameters
+        ----------
+        instance: Model
+            The model instance the expression will be evaluated against.
+        """
+        node = self.tree if node is None else node
+
+        match node:
+            case ast.Constant(value=value):
+                return value
+
+            case ast.Name(id=name) if name.lower() in CONSTANTS:
+                return CONSTANTS[name.lower()]
+
+            case ast.Name(id=name):
+                return getattr(instance, name.lower())
+
+            case ast.BinOp(left=left, op=op, right=right):
+                return OPERATORS[type(op)](
+                    self.evaluate(instance, left), self.evaluate(instance, right)
+                )
+
+            case ast.UnaryOp(op=op, operand=operand):
+                return UNARY_OPERATORS[type(op)](self.evaluate(instance, operand))
+
+            case ast.Call(func=ast.Name(id=name), args=args):
+                return FUNCTIONS[name.lower()](*[self.evaluate(instance, x) for x in args])
+
+    def value(self, instance, field_type):
+        """
+        Evaluates the expression and converts the result into the type of a field.
+        Fractional results are rounded when the field stores integers.
+
+        Parameters
+        ----------
+        instance: Model | None
+            The model instance the expression will be evaluated against.
+        field_type: Field
+            The field the result will be stored in.
+        """
+        result = self.evaluate(instance)
+
+        if field_type.__class__.__name__ in INTEGER_FIELDS and isinstance(
+            result, (float, Decimal)
+        ):
+            if not math.isfinite(result):
+                raise Exception(f"{result} can't be stored as an integer")
+
+            return round(result)
+
+        return Utils.coerce(field_type, result)
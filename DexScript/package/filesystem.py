@@ -0,0 +1,672 @@
+import asyncio
+import csv
+import gzip
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import sys
+import tempfile
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+from enum import Enum
+from functools import partial
+from io import BytesIO
+from pathlib import Path
+from typing import Callable
+
+import aiohttp
+import discord
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+CHUNK_SIZE = 256 * 1024
+MAX_WORKERS = 4
+
+DIGEST_RE = re.compile(r"^([0-9a-f]{64})(\.\S+)?$")
+
+IMAGE_FORMATS = {"PNG": ".png", "JPEG": ".jpg", "WEBP": ".webp", "GIF": ".gif"}
+ARCHIVE_ENTRY_LIMIT = 25 * 1024 * 1024
+
+executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="dexscript-io")
+
+# Created on first use, so importing DexScript doesn't start worker processes.
+processes: ProcessPoolExecutor | None = None
+
+
+@dataclass
+class Download:
+    """
+    An attachment that has been downloaded to a temporary file.
+    """
+
+    path: Path
+    digest: str
+
+
+def normalize_image(data: bytes) -> tuple[bytes, str]:
+    """
+    Validates image data and converts formats Discord cannot display into PNG.
+    Returns the image data along with its file extension. This runs inside of a process pool.
+
+    Parameters
+    ----------
+    data: bytes
+        The image data you want to normalize.
+    """
+    from PIL import Image
+
+    with Image.open(BytesIO(data)) as image:
+        image.verify()
+
+    with Image.open(BytesIO(data)) as image:
+        extension = IMAGE_FORMATS.get(image.format)
+
+        if extension is not None:
+            return data, extension
+
+        output = BytesIO()
+        image.save(output, "PNG")
+
+    return output.getvalue(), ".png"
+
+
+class FileSystem:
+    """
+    Asynchronous filesystem operations backed by a bounded thread pool, used to keep
+    blocking disk work off of the event loop.
+    """
+
+    @staticmethod
+    async def run(function: Callable, *args, **kwargs):
+        """
+        Runs a blocking function inside of the filesystem thread pool.
+
+        Parameters
+        ----------
+        function: Callable
+            The function you want to run.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, partial(function, *args, **kwargs))
+
+    @staticmethod
+    async def run_process(function: Callable, *args):
+        """
+        Runs a CPU-bound function inside of the process pool.
+
+        Parameters
+        ----------
+        function: Callable
+            The function you want to run. It must be defined at the top level of a module.
+        """
+        global processes
+
+        if processes is None:
+            # Forking a process that's running threads and an event loop can deadlock the
+            # child, so workers are started from a fresh interpreter instead.
+            processes = ProcessPoolExecutor(
+                max_workers=min(MAX_WORKERS, os.cpu_count() or 1),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(processes, function, *args)
+
+    @staticmethod
+    def archive_entries(path: str | Path) -> dict[str, str]:
+        """
+        Returns a dictionary mapping the lowercase filename stem of every file inside of a
+        ZIP archive to its entry name. Files that share a stem raise an exception, since they
+        would match the same model instance.
+
+        Parameters
+        ----------
+        path: str | Path
+            The path of the ZIP archive.
+        """
+        entries = {}
+
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                entry = Path(info.filename)
+
+                if info.is_dir() or entry.name.startswith(".") or "__MACOSX" in entry.parts:
+                    continue
+
+                if info.file_size > ARCHIVE_ENTRY_LIMIT:
+                    raise Exception(f"'{info.filename}' exceeds the archive entry size limit")
+
+                stem = entry.stem.lower()
+
+                if stem in entries:
+                    raise Exception(
+                        f"'{info.filename}' and '{entries[stem]}' match the same name, "
+                        "so only one of them can be imported"
+                    )
+
+                entries[stem] = info.filename
+
+        return entries
+
+    @staticmethod
+    def read_archive(path: str | Path, names: list[str]) -> list[bytes]:
+        """
+        Reads the contents of the specified entries inside of a ZIP archive.
+
+        Parameters
+        ----------
+        path: str | Path
+            The path of the ZIP archive.
+        names: list[str]
+            The entry names you want to read.
+        """
+        with zipfile.ZipFile(path) as archive:
+            return [archive.read(name) for name in names]
+
+    @staticmethod
+    def load_rows(path: str | Path) -> list[tuple[int, dict | Exception]]:
+        """
+        Loads every row of a JSON, YAML, CSV, or JSON Lines file along with its position.
+        JSON and YAML files must contain a list of objects.
+
+        Parameters
+        ----------
+        path: str | Path
+            The path of the file you want to load.
+        """
+        path = Path(path)
+        suffix = path.suffix.lower()
+
+        if suffix in RowReader.FORMATS:
+            reader = RowReader(path)
+
+            try:
+                return reader._read(sys.maxsize)
+            finally:
+                reader.file.close()
+
+        with open(path, "r", encoding="utf-8-sig") as file:
+            match suffix:
+                case ".json":
+                    data = json.load(file)
+                case ".yaml" | ".yml":
+                    if yaml is None:
+                        raise Exception("PyYAML must be installed to load YAML files")
+
+                    data = yaml.safe_load(file)
+                case _:
+                    raise Exception(f"'{path.name}' must be a JSON, YAML, CSV, or JSON Lines file")
+
+        if not isinstance(data, list):
+            raise Exception(f"'{path.name}' must contain a list of objects")
+
+        return [
+            (index, row if isinstance(row, dict) else Exception("Each row must be an object"))
+            for index, row in enumerate(data, start=1)
+        ]
+
+    @staticmethod
+    def _write_atomic(path: str | Path, content: str | bytes):
+        mode = "wb" if isinstance(content, bytes) else "w"
+        temporary_path = f"{path}.part"
+
+        with open(temporary_path, mode) as file:
+            file.write(content)
+
+        os.replace(temporary_path, path)
+
+    @staticmethod
+    def _move(source: str | Path, destination: str | Path):
+        try:
+            os.replace(source, destination)
+        except OSError:
+            temporary_path = f"{destination}.part"
+
+            shutil.copyfile(source, temporary_path)
+            os.replace(temporary_path, destination)
+            os.remove(source)
+
+    @staticmethod
+    def _read(path: str | Path) -> str:
+        with open(path, "r") as file:
+            return file.read()
+
+    @staticmethod
+    def _remove(path: str | Path) -> bool:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+            return True
+
+        os.remove(path)
+        return False
+
+    @staticmethod
+    async def read_text(path: str | Path) -> str:
+        """
+        Reads the contents of a text file.
+
+        Parameters
+        ----------
+        path: str | Path
+            The path of the file you want to read.
+        """
+        return await FileSystem.run(FileSystem._read, path)
+
+    @staticmethod
+    async def write(path: str | Path, content: str | bytes):
+        """
+        Writes content to a temporary file and renames it over the path once finished.
+
+        Parameters
+        ----------
+        path: str | Path
+            The path of the file you want to write to.
+        content: str | bytes
+            The content you want to write.
+        """
+        await FileSystem.run(FileSystem._write_atomic, path, content)
+
+    @staticmethod
+    async def move(source: str | Path, destination: str | Path):
+        """
+        Atomically moves a file, copying it first if it is on a different filesystem.
+
+        Parameters
+        ----------
+        source: str | Path
+            The path of the file you want to move.
+        destination: str | Path
+            The path the file will be moved to.
+        """
+        await FileSystem.run(FileSystem._move, source, destination)
+
+    @staticmethod
+    async def isfile(path: str | Path) -> bool:
+        return await FileSystem.run(os.path.isfile, path)
+
+    @staticmethod
+    async def listdir(path: str | Path | None = None) -> list[str]:
+        return await FileSystem.run(os.listdir, path)
+
+    @staticmethod
+    async def remove(path: str | Path) -> bool:
+        """
+        Removes a file or directory, returning whether a directory was removed.
+
+        Parameters
+        ----------
+        path: str | Path
+            The path of the file or directory you want to remove.
+        """
+        return await FileSystem.run(FileSystem._remove, path)
+
+    @staticmethod
+    async def discord_file(path: str | Path) -> discord.File:
+        """
+        Opens a `discord.File` object without blocking the event loop.
+
+        Parameters
+        ----------
+        path: str | Path
+            The path of the file you want to open.
+        """
+        return await FileSystem.run(discord.File, path)
+
+    @staticmethod
+    async def stream_attachment(attachment: discord.Attachment, path: str | Path) -> str:
+        """
+        Streams a `discord.Attachment` object to disk in chunks and returns its SHA-256 digest.
+        The attachment is written to a temporary file, which is renamed over the path once
+        the download finishes.
+
+        Parameters
+        ----------
+        attachment: discord.Attachment
+            The attachment you want to download.
+        path: str | Path
+            The path the attachment will be saved to.
+        """
+        temporary_path = f"{path}.part"
+        file = await FileSystem.run(open, temporary_path, "wb")
+        digest = hashlib.sha256()
+
+        def write_chunk(chunk):
+            file.write(chunk)
+            digest.update(chunk)
+
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(attachment.url) as response:
+                    response.raise_for_status()
+
+                    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                        await FileSystem.run(write_chunk, chunk)
+        except BaseException:
+            await FileSystem.run(file.close)
+            await FileSystem.run(os.remove, temporary_path)
+            raise
+
+        await FileSystem.run(file.close)
+        await FileSystem.run(os.replace, temporary_path, path)
+
+        return digest.hexdigest()
+
+    @staticmethod
+    async def download(attachment: discord.Attachment) -> Download:
+        """
+        Streams a `discord.Attachment` object into a temporary file.
+
+        Parameters
+        ----------
+        attachment: discord.Attachment
+            The attachment you want to download.
+        """
+        # Unique, so scripts and background jobs downloading the same attachment don't share
+        # a file that either of them may remove.
+        name = f"dexscript-{attachment.id}-{uuid.uuid4().hex}-{attachment.filename}"
+        path = Path(tempfile.gettempdir()) / name
+        digest = await FileSystem.stream_attachment(attachment, path)
+
+        return Download(path, digest)
+
+
+class RowReader:
+    """
+    Reads rows from a CSV or JSON Lines file in chunks, without loading the entire file
+    into memory. Rows that can't be decoded are returned as exceptions.
+    """
+
+    FORMATS = (".csv", ".jsonl", ".ndjson")
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.format = self.path.suffix.lower()
+
+        if self.format not in self.FORMATS:
+            raise Exception(f"'{self.path.name}' must be a CSV or JSON Lines file")
+
+        self.file = open(self.path, "r", newline="", encoding="utf-8-sig")
+        self.line = 0
+        self.csv_reader = csv.DictReader(self.file) if self.format == ".csv" else None
+
+    def _read(self, size: int) -> list[tuple[int, dict | Exception]]:
+        rows = []
+
+        while len(rows) < size:
+            if self.csv_reader is not None:
+                row = next(self.csv_reader, None)
+
+                if row is None:
+                    break
+
+                rows.append((self.csv_reader.line_num, row))
+                continue
+
+            line = self.file.readline()
+            self.line += 1
+
+            if not line:
+                break
+
+            if not line.strip():
+                continue
+
+            try:
+                rows.append((self.line, json.loads(line)))
+            except json.JSONDecodeError as error:
+                rows.append((self.line, error))
+
+        return rows
+
+    async def read(self, size: int) -> list[tuple[int, dict | Exception]]:
+        """
+        Reads the next rows of the file along with their line numbers.
+
+        Parameters
+        ----------
+        size: int
+            The maximum amount of rows that will be read.
+        """
+        return await FileSystem.run(self._read, size)
+
+    async def close(self):
+        await FileSystem.run(self.file.close)
+
+
+class RowWriter:
+    """
+    Writes rows into gzip-compressed CSV or JSON Lines files in a temporary directory.
+    A new part is started whenever the compressed size reaches the size limit.
+    """
+
+    FORMATS = ("csv", "jsonl")
+
+    def __init__(self, name: str, format: str, columns: list[str], size_limit: int):
+        self.name = name
+        self.format = format
+        self.columns = columns
+        self.size_limit = int(size_limit * 0.9)
+
+        self.directory = Path(tempfile.mkdtemp(prefix="dexscript-"))
+        self.paths: list[Path] = []
+
+        self.raw = None
+        self.text = None
+        self.csv_writer = None
+
+    @staticmethod
+    def serialize(value):
+        if isinstance(value, Enum):
+            return value.value
+
+        if isinstance(value, date):
+            return value.isoformat()
+
+        if isinstance(value, (list, dict)):
+            return json.dumps(value)
+
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+
+        return str(value)
+
+    def _close_part(self):
+        if self.text is not None:
+            self.text.close()
+            self.raw.close()
+
+        self.raw, self.text, self.csv_writer = None, None, None
+
+    def _open_part(self):
+        self._close_part()
+
+        path = self.directory / f"{self.name}-{len(self.paths) + 1}.{self.format}.gz"
+        self.paths.append(path)
+
+        self.raw = open(path, "wb")
+        self.text = io.TextIOWrapper(
+            gzip.GzipFile(fileobj=self.raw, mode="wb"), encoding="utf-8", newline=""
+        )
+
+        if self.format == "csv":
+            self.csv_writer = csv.writer(self.text)
+            self.csv_writer.writerow(self.columns)
+
+    def _write(self, rows: list[dict]):
+        for row in rows:
+            if self.raw is None or self.raw.tell() >= self.size_limit:
+                self._open_part()
+
+            values = [self.serialize(row.get(x)) for x in self.columns]
+
+            if self.csv_writer is not None:
+                self.csv_writer.writerow(values)
+            else:
+                self.text.write(json.dumps(dict(zip(self.columns, values))) + "\n")
+
+    async def write(self, rows: list[dict]):
+        """
+        Writes rows into the current part, starting new parts when necessary.
+
+        Parameters
+        ----------
+        rows: list[dict]
+            The rows you want to write, mapping each column to its value.
+        """
+        await FileSystem.run(self._write, rows)
+
+    async def close(self):
+        await FileSystem.run(self._close_part)
+
+
+class DirectoryIndex:
+    """
+    A cached set of the file names inside of a directory. The directory is only rescanned
+    when its modification time changes, so lookups don't touch the disk.
+    """
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self.names: set[str] = set()
+        self.mtime: int | None = None
+
+    def refresh(self) -> set[str]:
+        """
+        Rescans the directory if it has changed since the last scan.
+        """
+        try:
+            mtime = os.stat(self.root).st_mtime_ns
+        except FileNotFoundError:
+            self.names, self.mtime = set(), None
+            return self.names
+
+        if mtime != self.mtime:
+            self.names = {entry.name for entry in os.scandir(self.root) if entry.is_file()}
+            self.mtime = mtime
+
+        return self.names
+
+    def add(self, name: str):
+        self.names.add(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.names
+
+
+class ContentStore:
+    """
+    Stores files under the SHA-256 digest of their contents, so uploading the same file
+    twice reuses the existing copy instead of creating a duplicate.
+    """
+
+    def __init__(self, root: str | Path, files: DirectoryIndex | None = None):
+        self.root = Path(root)
+        self.files = files or DirectoryIndex(root)
+        self.digests: dict[str, str] | None = None
+        self.lock = asyncio.Lock()
+
+    @staticmethod
+    def file_digest(path: str | Path) -> str:
+        digest = hashlib.sha256()
+
+        with open(path, "rb") as file:
+            while chunk := file.read(CHUNK_SIZE):
+                digest.update(chunk)
+
+        return digest.hexdigest()
+
+    def _index(self) -> dict[str, str]:
+        digests = {}
+
+        if not self.root.is_dir():
+            return digests
+
+        for entry in os.scandir(self.root):
+            if not entry.is_file() or entry.name.startswith(".") or entry.name.endswith(".part"):
+                continue
+
+            match = DIGEST_RE.match(entry.name)
+            digest = match.group(1) if match else self.file_digest(entry.path)
+
+            digests.setdefault(digest, entry.name)
+
+        return digests
+
+    def _commit(self, temporary_path: Path, digest: str, extension: str) -> str:
+        existing = self.digests.get(digest)
+
+        if existing is not None and (self.root / existing).is_file():
+            os.remove(temporary_path)
+            return existing
+
+        name = f"{digest}{extension}"
+        FileSystem._move(temporary_path, self.root / name)
+
+        self.digests[digest] = name
+        self.files.add(name)
+
+        return name
+
+    def _store_bytes(self, data: bytes, extension: str) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        existing = self.digests.get(digest)
+
+        if existing is not None and (self.root / existing).is_file():
+            return existing
+
+        temporary_path = self.root / f".{digest}.upload"
+        FileSystem._write_atomic(temporary_path, data)
+
+        return self._commit(temporary_path, digest, extension)
+
+    async def index(self) -> dict[str, str]:
+        """
+        Returns a dictionary mapping digests to file names, hashing existing files once.
+        """
+        async with self.lock:
+            if self.digests is None:
+                self.digests = await FileSystem.run(self._index)
+
+        return self.digests
+
+    async def store(self, download: Download, extension: str) -> str:
+        """
+        Moves a downloaded attachment into the store and returns the name of the stored file.
+
+        Parameters
+        ----------
+        download: Download
+            The downloaded attachment you want to store.
+        extension: str
+            The file extension the stored file will use.
+        """
+        await self.index()
+
+        async with self.lock:
+            return await FileSystem.run(self._commit, download.path, download.digest, extension)
+
+    async def store_bytes(self, data: bytes, extension: str) -> str:
+        """
+        Writes data into the store and returns the name of the stored file.
+
+        Parameters
+        ----------
+        data: bytes
+            The data you want to store.
+        extension: str
+            The file extension the stored file will use.
+        """
+        await self.index()
+
+        async with self.lock:
+            return await FileSystem.run(self._store_bytes, data, extension)
@@ -0,0 +1,194 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from dataclasses import field as datafield
+from enum import Enum
+
+from . import parser
+from .metrics import metrics
+
+MAX_HISTORY = 50
+
+
+class JobStatus(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    FINISHED = "finished"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+@dataclass
+class BackgroundJob:
+    """
+    DexScript code running in the background, along with its progress.
+    """
+
+    id: int
+    code: str
+    author: str
+
+    status: JobStatus = JobStatus.QUEUED
+    created: float = datafield(default_factory=time.time)
+    started: float | None = None
+    finished: float | None = None
+
+    completed: int = 0
+    total: int = 0
+    line: str | None = None
+    error: str | None = None
+
+    task: asyncio.Task | None = datafield(default=None, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in (JobStatus.FINISHED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+    def progress(self, completed: int, total: int, line: str):
+        self.completed = completed
+        self.total = total
+        self.line = line
+
+    def format(self) -> str:
+        end = self.finished or time.time()
+        elapsed = end - (self.started or end)
+
+        text = (
+            f"#{self.id} | {self.status.name} | {self.completed}/{self.total} lines "
+            f"| {elapsed:.1f}s | {self.author}"
+        )
+
+        if self.error is not None:
+            return f"{text}\n  ERROR: {self.error}"
+
+        if self.status == JobStatus.RUNNING and self.line is not None:
+            return f"{text}\n  > {self.line}"
+
+        return text
+
+
+class JobManager:
+    """
+    Runs DexScript code in the background with bounded concurrency, so long maintenance
+    scripts don't hold the invoking command or run unbounded alongside live traffic.
+    """
+
+    def __init__(self):
+        self.jobs: dict[int, BackgroundJob] = {}
+        self.last_id = 0
+
+        self.concurrency = 1
+        self.running = 0
+
+        self._condition = asyncio.Condition()
+
+    def submit(self, ctx, bot, code: str, concurrency: int) -> BackgroundJob:
+        """
+        Queues code to run in the background and reports its result in the channel.
+
+        Parameters
+        ----------
+        ctx: commands.Context
+            The context the job was submitted from.
+        bot: commands.Bot
+            The bot running DexScript.
+        code: str
+            The DexScript code the job will run.
+        concurrency: int
+            The maximum amount of jobs that can run at the same time. Changing it applies
+            to every queued job.
+        """
+        self.concurrency = max(concurrency, 1)
+        self.last_id += 1
+
+        job = BackgroundJob(self.last_id, code, str(ctx.author))
+        job.task = asyncio.create_task(self._run(job, ctx, bot))
+
+        self.jobs[job.id] = job
+
+        for job_id in [x.id for x in self.jobs.values() if x.done][:-MAX_HISTORY]:
+            del self.jobs[job_id]
+
+        metrics.increment("dexscript_jobs_total")
+
+        return job
+
+    async def _acquire(self):
+        async with self._condition:
+            # The limit may have been raised since the queued jobs last checked it.
+            self._condition.notify_all()
+
+            await self._condition.wait_for(lambda: self.running < self.concurrency)
+            self.running += 1
+
+    async def _release(self):
+        async with self._condition:
+            self.running -= 1
+            self._condition.notify_all()
+
+    async def _run(self, job: BackgroundJob, ctx, bot):
+        try:
+            await self._acquire()
+
+            try:
+                job.status = JobStatus.RUNNING
+                job.started = time.time()
+
+                result = await parser.DexScriptParser(ctx, bot, job).execute(job.code)
+
+                if result is not None:
+                    raise Exception(result)
+            finally:
+                await asyncio.shield(self._release())
+        except asyncio.CancelledError:
+            job.status = JobStatus.CANCELLED
+        except Exception as error:
+            job.status = JobStatus.FAILED
+            job.error = str(error)
+        else:
+            job.status = JobStatus.FINISHED
+        finally:
+            job.finished = time.time()
+            metrics.increment("dexscript_jobs_completed_total", status=job.status.value)
+
+        await ctx.send(f"Job `#{job.id}` {job.status.value}:\n```{job.format()}```")
+
+    def get(self, job_id: int | str) -> BackgroundJob:
+        """
+        Returns a job from its ID, which may be prefixed with `#`.
+
+        Parameters
+        ----------
+        job_id: int | str
+            The ID of the job you want to return.
+        """
+        try:
+            job_id = int(str(job_id).lstrip("#"))
+        except ValueError:
+            raise Exception(f"'{job_id}' is not a valid job ID")
+
+        if job_id not in self.jobs:
+            raise Exception(f"Job `#{job_id}` does not exist")
+
+        return self.jobs[job_id]
+
+    def cancel(self, job_id: int | str) -> BackgroundJob:
+        """
+        Cancels a queued or running job. Lines that already ran are not reverted.
+
+        Parameters
+        ----------
+        job_id: int | str
+            The ID of the job you want to cancel.
+        """
+        job = self.get(job_id)
+
+        if job.done:
+            raise Exception(f"Job `#{job_id}` has already {job.status.value}")
+
+        job.task.cancel()
+
+        return job
+
+
+job_manager = JobManager()
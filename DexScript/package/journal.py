@@ -0,0 +1,361 @@
+import gzip
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from dataclasses import field as datafield
+from pathlib import Path
+
+from tortoise import Tortoise
+
+from .filesystem import FileSystem, RowWriter
+from .metrics import metrics
+from .utils import Utils, config
+
+JOURNAL_PATH = "dexscript_journal"
+MAX_CHANGESETS = 100
+
+
+@dataclass
+class Changeset:
+    """
+    The rows and columns changed by a single mutating DexScript command.
+    """
+
+    id: str
+    model: str
+    command: str
+    key: str
+    timestamp: float = datafield(default_factory=time.time)
+
+    created: list = datafield(default_factory=list)
+    updated: list = datafield(default_factory=list)
+    deleted: list = datafield(default_factory=list)
+
+    # Rows of other models deleted or updated along with deleted rows through relations,
+    # stored as `[model, "deleted" | "updated", rows]` in the order they can be restored.
+    cascaded: list = datafield(default_factory=list)
+
+    skipped: bool = False
+
+    def __len__(self):
+        cascaded = sum(len(rows) for _, _, rows in self.cascaded)
+        return len(self.created) + len(self.updated) + len(self.deleted) + cascaded
+
+
+class Journal:
+    """
+    Stores changesets on disk so mutating commands can be undone. Only the rows and columns
+    a command changes are captured, using a single bounded query per command.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.last_id = 0
+
+    def new(self, model, command: str) -> Changeset:
+        """
+        Creates an empty changeset for a model.
+
+        Parameters
+        ----------
+        model: Value
+            The model the command changes.
+        command: str
+            The name of the command.
+        """
+        changeset_id = max(time.time_ns() // 1_000_000, self.last_id + 1)
+        self.last_id = changeset_id
+
+        return Changeset(f"{changeset_id:x}", model.name, command, model.extra_data[0])
+
+    @staticmethod
+    def serialize_row(row: dict) -> dict:
+        return {key: RowWriter.serialize(value) for key, value in row.items()}
+
+    @staticmethod
+    def accepts(changeset: Changeset, amount: int) -> bool:
+        """
+        Returns whether more rows can be added to a changeset. Changesets that would exceed
+        the journal limit are skipped instead, so the command still runs without being
+        journaled.
+
+        Parameters
+        ----------
+        changeset: Changeset
+            The changeset the rows will be added to.
+        amount: int
+            The amount of rows that will be added.
+        """
+        if not config.journal or changeset.skipped:
+            return False
+
+        if len(changeset) + amount > config.journallimit:
+            changeset.skipped = True
+            changeset.created, changeset.updated, changeset.deleted = [], [], []
+            changeset.cascaded = []
+
+            metrics.increment("dexscript_journal_skipped_total")
+            return False
+
+        return True
+
+    async def fetch(self, changeset: Changeset, queryset, *columns: str) -> list[dict]:
+        """
+        Fetches the current values of the specified columns, or an empty list if the rows
+        can't be journaled. If no columns are specified, every column is fetched.
+
+        Parameters
+        ----------
+        changeset: Changeset
+            The changeset the rows will be added to.
+        queryset: QuerySet
+            The queryset containing the rows that will be changed.
+        """
+        if not self.accepts(changeset, 0):
+            return []
+
+        pk_name = queryset.model._meta.pk_attr
+        columns = (pk_name, *[x for x in columns if x != pk_name]) if columns else ()
+
+        remaining = config.journallimit - len(changeset)
+
+        rows = await queryset.limit(remaining + 1).values(*columns)
+        metrics.query()
+
+        if not self.accepts(changeset, len(rows)):
+            return []
+
+        return [self.serialize_row(row) for row in rows]
+
+    def record_create(self, changeset: Changeset, pk):
+        """
+        Records the primary key of an instance that has been created.
+        """
+        if self.accepts(changeset, 1):
+            changeset.created.append(RowWriter.serialize(pk))
+
+    def record_update(self, changeset: Changeset, pk, row: dict):
+        """
+        Records the previous values of an instance that has already been fetched.
+        """
+        if self.accepts(changeset, 1):
+            changeset.updated.append([RowWriter.serialize(pk), self.serialize_row(row)])
+
+    async def capture_create(self, changeset: Changeset, queryset):
+        """
+        Captures the primary keys of rows that have just been created in bulk. The queryset
+        must only contain the created rows.
+        """
+        pk_name = queryset.model._meta.pk_attr
+
+        for row in await self.fetch(changeset, queryset, pk_name):
+            changeset.created.append(row[pk_name])
+
+    async def capture_update(self, changeset: Changeset, queryset, *columns: str):
+        """
+        Captures the current values of columns that are about to be updated.
+        """
+        pk_name = queryset.model._meta.pk_attr
+
+        for row in await self.fetch(changeset, queryset, *columns):
+            changeset.updated.append([row.pop(pk_name), row])
+
+    @staticmethod
+    def cascades(model) -> list[tuple]:
+        """
+        Returns the model, foreign key column, and `on_delete` action of every relation that
+        references a model, so the rows deleting an instance changes can be found.
+
+        Parameters
+        ----------
+        model: Model
+            The model whose instances will be deleted.
+        """
+        meta = model._meta
+        relations = []
+
+        for name in (*meta.backward_fk_fields, *meta.backward_o2o_fields):
+            backward = meta.fields_map[name]
+            related = backward.related_model
+
+            for field in (*related._meta.fk_fields, *related._meta.o2o_fields):
+                forward = related._meta.fields_map[field]
+
+                if forward.related_model is not model:
+                    continue
+
+                if forward.source_field == backward.relation_field:
+                    relations.append((related, forward.source_field, forward.on_delete))
+
+        return relations
+
+    async def _capture_cascades(self, changeset: Changeset, model, pks: list):
+        for related, column, on_delete in self.cascades(model):
+            if pks == [] or changeset.skipped:
+                return
+
+            pk_name = related._meta.pk_attr
+            queryset = related.filter(**{f"{column}__in": pks})
+            name = f"{related._meta.app}.{related.__name__}"
+
+            if on_delete == "CASCADE":
+                rows = await self.fetch(changeset, queryset)
+
+                if rows:
+                    changeset.cascaded.append([name, "deleted", rows])
+
+                await self._capture_cascades(changeset, related, [x[pk_name] for x in rows])
+            elif on_delete == "SET NULL":
+                rows = await self.fetch(changeset, queryset, column)
+
+                if rows:
+                    updated = [[x.pop(pk_name), x] for x in rows]
+                    changeset.cascaded.append([name, "updated", updated])
+
+    async def capture_delete(self, changeset: Changeset, queryset):
+        """
+        Captures every column of rows that are about to be deleted, along with the rows of
+        other models that foreign keys will delete or clear with them.
+        """
+        rows = await self.fetch(changeset, queryset)
+        changeset.deleted.extend(rows)
+
+        pk_name = queryset.model._meta.pk_attr
+        await self._capture_cascades(changeset, queryset.model, [x[pk_name] for x in rows])
+
+    def _save(self, changeset: Changeset):
+        os.makedirs(self.path, exist_ok=True)
+
+        with gzip.open(self.path / f"{changeset.id}.json.gz", "wt", encoding="utf-8") as file:
+            json.dump(asdict(changeset), file, separators=(",", ":"))
+
+        for name in sorted(os.listdir(self.path))[:-MAX_CHANGESETS]:
+            os.remove(self.path / name)
+
+    def _load(self, changeset_id: str | None) -> Changeset | None:
+        if not self.path.is_dir():
+            return None
+
+        names = sorted(os.listdir(self.path))
+
+        if changeset_id is not None:
+            names = [x for x in names if x == f"{changeset_id.lower()}.json.gz"]
+
+        if names == []:
+            return None
+
+        with gzip.open(self.path / names[-1], "rt", encoding="utf-8") as file:
+            return Changeset(**json.load(file))
+
+    def _list(self) -> list[Changeset]:
+        if not self.path.is_dir():
+            return []
+
+        changesets = []
+
+        for name in sorted(os.listdir(self.path), reverse=True):
+            with gzip.open(self.path / name, "rt", encoding="utf-8") as file:
+                changesets.append(Changeset(**json.load(file)))
+
+        return changesets
+
+    async def save(self, changeset: Changeset, ctx=None):
+        """
+        Writes a changeset to disk if journaling is enabled and it contains changes.
+        If the changeset was skipped, a warning is sent to `ctx` instead.
+        """
+        if changeset.skipped and ctx is not None:
+            await ctx.send(
+                f"-# This command changed more than {config.journallimit} rows, so it wasn't "
+                "journaled and can't be undone."
+            )
+
+        if not config.journal or changeset.skipped or len(changeset) == 0:
+            return
+
+        await FileSystem.run(self._save, changeset)
+
+    async def load(self, changeset_id: str | None = None) -> Changeset | None:
+        """
+        Loads a changeset from disk, or the latest changeset if `changeset_id` is None.
+        """
+        return await FileSystem.run(self._load, changeset_id)
+
+    async def list(self) -> list[Changeset]:
+        """
+        Returns every stored changeset, from newest to oldest.
+        """
+        return await FileSystem.run(self._list)
+
+    async def discard(self, changeset: Changeset):
+        await FileSystem.remove(self.path / f"{changeset.id}.json.gz")
+
+    @staticmethod
+    def _restore(model, row: dict) -> dict:
+        fields_map = model._meta.fields_map
+
+        return {
+            key: Utils.coerce(fields_map[key], value) if key in fields_map else value
+            for key, value in row.items()
+        }
+
+    async def _undo_updates(self, model, updated: list):
+        pk_field = model._meta.fields_map[model._meta.pk_attr]
+
+        old_values = {Utils.coerce(pk_field, pk): row for pk, row in updated}
+        groups = {}
+
+        for instance in await model.filter(pk__in=list(old_values)):
+            row = self._restore(model, old_values[instance.pk])
+
+            for column, value in row.items():
+                setattr(instance, column, value)
+
+            groups.setdefault(frozenset(row), []).append(instance)
+
+        metrics.query()
+
+        for fields, instances in groups.items():
+            await model.bulk_update(instances, fields=list(fields))
+            metrics.query()
+
+    async def _undo_deletes(self, model, deleted: list):
+        await model.bulk_create([model(**self._restore(model, row)) for row in deleted])
+        metrics.query()
+
+    async def undo(self, changeset: Changeset):
+        """
+        Restores the rows and columns captured by a changeset using bulk writes. Deleted
+        rows are restored before the rows that referenced them.
+        """
+        model = Utils.fetch_model(changeset.model)
+        pk_field = model._meta.fields_map[model._meta.pk_attr]
+
+        if changeset.created:
+            created = [Utils.coerce(pk_field, pk) for pk in changeset.created]
+
+            await model.filter(pk__in=created).delete()
+            metrics.query()
+
+        if changeset.updated:
+            await self._undo_updates(model, changeset.updated)
+
+        if changeset.deleted:
+            await self._undo_deletes(model, changeset.deleted)
+
+        for name, action, rows in changeset.cascaded:
+            app, model_name = name.split(".")
+            related = Tortoise.apps[app][model_name]
+
+            if action == "deleted":
+                await self._undo_deletes(related, rows)
+            else:
+                await self._undo_updates(related, rows)
+
+        metrics.rows(len(changeset))
+
+        await self.discard(changeset)
+
+
+journal = Journal(JOURNAL_PATH)
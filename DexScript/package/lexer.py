@@ -0,0 +1,170 @@
+import re
+from typing import Iterator, NamedTuple
+
+WORD = 0
+STRING = 1
+
+SPECIAL_RE = re.compile(r"[>\n\"']")
+COMMENT_RE = re.compile(r"[^\S\n]*--[^\n]*")
+STRING_END_RE = {
+    '"': re.compile(r'\\.|"', re.DOTALL),
+    "'": re.compile(r"\\.|'", re.DOTALL),
+}
+ESCAPE_RE = re.compile(r"\\(.)", re.DOTALL)
+
+ESCAPES = {
+    "n": "\n",
+    "t": "\t",
+    "\\": "\\",
+    '"': '"',
+    "'": "'",
+    ">": ">",
+}
+
+
+class Token(NamedTuple):
+    """
+    A single argument of a DexScript line, stored as offsets into the source code.
+    """
+
+    type: int
+    start: int
+    end: int
+    line: int
+    column: int
+
+
+class Lexer:
+    """
+    Splits DexScript code into lines of tokens in a single pass. Arguments are separated
+    by `>` and lines by newlines, while arguments wrapped in quotes may contain either and
+    support backslash escapes. Lines starting with `--` are comments.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+
+    def text(self, token: Token) -> str:
+        """
+        Returns the text of a token, decoding escapes inside of quoted strings.
+
+        Parameters
+        ----------
+        token: Token
+            The token you want to return the text of.
+        """
+        value = self.source[token.start : token.end]
+
+        if token.type == STRING and "\\" in value:
+            return ESCAPE_RE.sub(lambda x: ESCAPES.get(x.group(1), x.group(0)), value)
+
+        return value
+
+    def _string_end(self, quote: str, start: int, line: int, column: int) -> int:
+        position = start
+
+        while True:
+            match = STRING_END_RE[quote].search(self.source, position)
+
+            if match is None:
+                raise Exception(f"Unterminated string at line {line}, column {column}")
+
+            if match.group() == quote:
+                return match.start()
+
+            position = match.end()
+
+    def _word(self, start: int, end: int, line: int, line_start: int) -> Token | None:
+        source = self.source
+
+        while start < end and source[start].isspace():
+            start += 1
+
+        while end > start and source[end - 1].isspace():
+            end -= 1
+
+        if start == end:
+            return None
+
+        return Token(WORD, start, end, line, start - line_start + 1)
+
+    def lines(self) -> Iterator[list[Token]]:
+        """
+        Yields every non-empty line of the source code as a list of tokens.
+        """
+        source = self.source
+        length = len(source)
+
+        tokens = []
+        line, line_start = 1, 0
+        string_token = None
+        in_word = False
+
+        comment = COMMENT_RE.match(source, 0)
+        position = segment_start = 0 if comment is None else comment.end()
+
+        while True:
+            match = SPECIAL_RE.search(source, position)
+            end = length if match is None else match.start()
+            character = None if match is None else match.group()
+
+            if string_token is not None and source[position:end].strip() != "":
+                raise Exception(
+                    f"Unexpected text after string at line {line}, "
+                    f"column {position - line_start + 1}"
+                )
+
+            if character in ('"', "'"):
+                column = end - line_start + 1
+
+                if string_token is not None:
+                    raise Exception(f"Unexpected quote at line {line}, column {column}")
+
+                # Quotes inside of a word, such as "Côte d'Ivoire", are kept as-is.
+                if in_word or source[segment_start:end].strip() != "":
+                    in_word = True
+                    position = end + 1
+                    continue
+
+                string_end = self._string_end(character, end + 1, line, column)
+                string_token = Token(STRING, end + 1, string_end, line, column)
+
+                newlines = source.count("\n", end + 1, string_end)
+
+                if newlines:
+                    line += newlines
+                    line_start = source.rfind("\n", end + 1, string_end) + 1
+
+                position = string_end + 1
+                continue
+
+            if string_token is not None:
+                tokens.append(string_token)
+                string_token = None
+            else:
+                token = self._word(segment_start, end, line, line_start)
+
+                if token is not None:
+                    tokens.append(token)
+
+            if character is None:
+                break
+
+            position = segment_start = end + 1
+            in_word = False
+
+            if character == "\n":
+                if tokens:
+                    yield tokens
+                    tokens = []
+
+                line += 1
+                line_start = position
+
+                comment = COMMENT_RE.match(source, position)
+
+                if comment is not None:
+                    position = segment_start = comment.end()
+
+        if tokens:
+            yield tokens
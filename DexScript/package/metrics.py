@@ -0,0 +1,268 @@
+import os
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from dataclasses import field as datafield
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+current_command: ContextVar[str] = ContextVar("dexscript_command", default="none")
+
+
+@dataclass
+class Histogram:
+    """
+    A latency histogram using fixed bucket boundaries (in seconds).
+    """
+
+    counts: list = datafield(default_factory=lambda: [0] * (len(BUCKETS) + 1))
+    total: float = 0.0
+    count: int = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, quantile: float) -> float:
+        """
+        Returns the upper bound of the bucket containing the specified quantile.
+
+        Parameters
+        ----------
+        quantile: float
+            The quantile you want to estimate, between 0 and 1.
+        """
+        target = quantile * self.count
+        seen = 0
+
+        for index, amount in enumerate(self.counts):
+            seen += amount
+
+            if seen >= target and amount:
+                return BUCKETS[index] if index < len(BUCKETS) else float("inf")
+
+        return 0.0
+
+
+@dataclass
+class Metrics:
+    """
+    Counters and latency histograms recorded while DexScript code runs.
+    """
+
+    counters: dict = datafield(default_factory=dict)
+    histograms: dict = datafield(default_factory=dict)
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> tuple:
+        return (name, tuple(sorted(labels.items())))
+
+    def increment(self, name: str, amount: float = 1, **labels):
+        """
+        Increments a counter.
+
+        Parameters
+        ----------
+        name: str
+            The name of the counter.
+        amount: float
+            The amount the counter will be incremented by.
+        """
+        key = self._key(name, labels)
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels):
+        """
+        Records a value inside of a histogram.
+
+        Parameters
+        ----------
+        name: str
+            The name of the histogram.
+        value: float
+            The value you want to record.
+        """
+        key = self._key(name, labels)
+        self.histograms.setdefault(key, Histogram()).observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """
+        Records how long the body of the `with` statement took to run.
+        """
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    @contextmanager
+    def command(self, name: str):
+        """
+        Times a DexScript command and attributes queries, rows, and sends to it.
+
+        Parameters
+        ----------
+        name: str
+            The name of the command, formatted as `Class.method`.
+        """
+        token = current_command.set(name)
+
+        self.increment("dexscript_commands_total", command=name)
+
+        try:
+            with self.timer("dexscript_command_seconds", command=name):
+                yield
+        except Exception:
+            self.increment("dexscript_command_errors_total", command=name)
+            raise
+        finally:
+            current_command.reset(token)
+
+    def query(self, amount: int = 1):
+        """
+        Records database queries for the command currently running.
+        """
+        self.increment("dexscript_db_queries_total", amount, command=current_command.get())
+
+    def rows(self, amount: int | None):
+        """
+        Records rows affected by the command currently running.
+        """
+        if not amount:
+            return
+
+        self.increment("dexscript_rows_affected_total", amount, command=current_command.get())
+
+    def send(self):
+        """
+        Records a Discord message sent by the command currently running.
+        """
+        self.increment("dexscript_discord_sends_total", command=current_command.get())
+
+    def reset(self):
+        self.counters.clear()
+        self.histograms.clear()
+
+    def summary(self) -> list[str]:
+        """
+        Returns a list of human-readable lines summarizing every command.
+        """
+        counters = {}
+
+        for (name, labels), amount in self.counters.items():
+            command = dict(labels).get("command")
+
+            if command is not None:
+                counters.setdefault(command, {})[name] = amount
+
+        lines = ["COMMAND | CALLS | ERRORS | AVG MS | P95 MS | QUERIES | ROWS | SENDS"]
+
+        for command, values in sorted(counters.items()):
+            histogram = self.histograms.get(
+                self._key("dexscript_command_seconds", {"command": command}), Histogram()
+            )
+            average = histogram.total / histogram.count * 1000 if histogram.count else 0
+
+            lines.append(
+                f"{command} | {values.get('dexscript_commands_total', 0):g} "
+                f"| {values.get('dexscript_command_errors_total', 0):g} "
+                f"| {average:.1f} | {histogram.quantile(0.95) * 1000:g} "
+                f"| {values.get('dexscript_db_queries_total', 0):g} "
+                f"| {values.get('dexscript_rows_affected_total', 0):g} "
+                f"| {values.get('dexscript_discord_sends_total', 0):g}"
+            )
+
+        parse = self.histograms.get(self._key("dexscript_parse_seconds", {}))
+
+        if parse is not None and parse.count:
+            lines.append(
+                f"\nPARSED {parse.count} SCRIPTS (AVG {parse.total / parse.count * 1000:.1f} MS)"
+            )
+
+        return lines
+
+    def prometheus(self) -> str:
+        """
+        Returns every metric formatted in the Prometheus text exposition format.
+        """
+
+        def format_labels(labels, extra=()):
+            pairs = [*labels, *extra]
+
+            if not pairs:
+                return ""
+
+            escaped = []
+
+            for key, value in pairs:
+                value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+                escaped.append(f'{key}="{value}"')
+
+            return "{" + ",".join(escaped) + "}"
+
+        lines = []
+        declared = set()
+
+        for (name, labels), amount in sorted(self.counters.items()):
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# TYPE {name} counter")
+
+            lines.append(f"{name}{format_labels(labels)} {amount:g}")
+
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# TYPE {name} histogram")
+
+            cumulative = 0
+
+            for bound, amount in zip((*BUCKETS, "+Inf"), histogram.counts):
+                cumulative += amount
+                bucket_labels = format_labels(labels, (("le", bound),))
+                lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+
+            lines.append(f"{name}_sum{format_labels(labels)} {histogram.total}")
+            lines.append(f"{name}_count{format_labels(labels)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str):
+        """
+        Atomically writes every metric to a Prometheus text-format file.
+
+        Parameters
+        ----------
+        path: str
+            The path of the file you want to write to.
+        """
+        temporary_path = f"{path}.tmp"
+
+        with open(temporary_path, "w") as file:
+            file.write(self.prometheus())
+
+        os.replace(temporary_path, path)
+
+
+class MeteredContext:
+    """
+    Wraps a `commands.Context` object and counts every message sent through it.
+    """
+
+    def __init__(self, ctx):
+        self._ctx = ctx
+
+    def __getattr__(self, name):
+        return getattr(self._ctx, name)
+
+    async def send(self, *args, **kwargs):
+        metrics.send()
+        return await self._ctx.send(*args, **kwargs)
+
+
+metrics = Metrics()
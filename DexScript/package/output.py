@@ -0,0 +1,182 @@
+import asyncio
+import time
+from collections import deque
+from io import StringIO
+
+import discord
+
+from .metrics import MeteredContext, metrics
+
+MESSAGE_LIMIT = 2000
+MAX_MESSAGES = 5
+BUFFER_LIMIT = MESSAGE_LIMIT * MAX_MESSAGES
+
+# Discord allows 5 messages every 5 seconds per channel.
+BUCKET_SIZE = 5
+BUCKET_PERIOD = 5.0
+
+
+class RateLimiter:
+    """
+    Tracks recently sent messages per channel, so output waits for room in the channel's
+    rate-limit bucket instead of being rejected and retried by Discord.
+    """
+
+    def __init__(self, size: int = BUCKET_SIZE, period: float = BUCKET_PERIOD):
+        self.size = size
+        self.period = period
+        self.buckets: dict[int, deque] = {}
+
+    async def acquire(self, channel_id: int):
+        """
+        Waits until a message can be sent to a channel and reserves a slot for it.
+
+        Parameters
+        ----------
+        channel_id: int
+            The ID of the channel the message will be sent to.
+        """
+        bucket = self.buckets.setdefault(channel_id, deque())
+
+        while True:
+            now = time.monotonic()
+
+            while bucket and now - bucket[0] >= self.period:
+                bucket.popleft()
+
+            if len(bucket) < self.size:
+                bucket.append(now)
+                return
+
+            metrics.increment("dexscript_rate_limit_waits_total")
+            await asyncio.sleep(self.period - (now - bucket[0]))
+
+
+class OutputBuffer(MeteredContext):
+    """
+    Wraps a `commands.Context` object and coalesces plain-text messages into as few Discord
+    messages as possible. Buffered output is sent once it has waited for `delay` seconds,
+    once it's too large to send as messages, or before anything that can't be buffered.
+
+    Buffered messages haven't been sent yet, so `send` returns None for them. Code that
+    edits, deletes, or reacts to a message must send it with `send_now` instead.
+    """
+
+    def __init__(self, ctx, delay: float):
+        super().__init__(ctx)
+
+        self._delay = delay
+        self._pending: list[str] = []
+        self._length = 0
+        self._timer = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def original(self):
+        """
+        The wrapped context, for work that outlives the script, such as background jobs.
+        """
+        return self._ctx
+
+    async def _send(self, *args, **kwargs):
+        await rate_limiter.acquire(getattr(self._ctx.channel, "id", 0))
+        return await super().send(*args, **kwargs)
+
+    async def send(self, content=None, **kwargs):
+        """
+        Buffers a plain-text message and returns None. Messages with files, embeds, or other
+        options flush the buffer and are sent immediately, returning the sent message.
+        """
+        if kwargs or content is None or self._delay <= 0:
+            return await self.send_now(content, **kwargs)
+
+        content = str(content)
+
+        self._pending.append(content)
+        self._length += len(content) + 1
+
+        if self._length >= BUFFER_LIMIT:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self._delay)
+
+        self._timer = None
+        await self.flush()
+
+    def _chunks(self) -> list[str]:
+        chunks = []
+
+        for content in self._pending:
+            if chunks and len(chunks[-1]) + len(content) + 1 <= MESSAGE_LIMIT:
+                chunks[-1] += f"\n{content}"
+            else:
+                chunks.append(content)
+
+        return chunks
+
+    async def flush(self):
+        """
+        Sends every buffered message. Output that would take more than a few messages,
+        or a message over Discord's character limit, is sent as a file instead.
+        """
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+            self._timer = None
+
+        async with self._lock:
+            if not self._pending:
+                return
+
+            chunks = self._chunks()
+            text = "\n".join(self._pending)
+
+            self._pending = []
+            self._length = 0
+
+            metrics.increment("dexscript_output_flushes_total")
+
+            if len(chunks) > MAX_MESSAGES or any(len(x) > MESSAGE_LIMIT for x in chunks):
+                await self._send(file=discord.File(StringIO(text), filename="output.txt"))
+                return
+
+            for chunk in chunks:
+                await self._send(chunk)
+
+    async def send_now(self, *args, **kwargs):
+        """
+        Flushes the buffer and sends a message immediately, returning the sent message.
+        """
+        await self.flush()
+        return await self._send(*args, **kwargs)
+
+    async def invoke(self, *args, **kwargs):
+        await self.flush()
+        return await self._ctx.invoke(*args, **kwargs)
+
+
+class BufferedBot:
+    """
+    Wraps the bot passed to commands, flushing buffered output such as a prompt before
+    waiting for a response.
+    """
+
+    def __init__(self, bot, output: OutputBuffer):
+        self._bot = bot
+        self._output = output
+
+    def __getattr__(self, name):
+        return getattr(self._bot, name)
+
+    @property
+    def original(self):
+        return self._bot
+
+    async def wait_for(self, *args, **kwargs):
+        await self._output.flush()
+        return await self._bot.wait_for(*args, **kwargs)
+
+
+rate_limiter = RateLimiter()
@@ -1,60 +1,99 @@
-import inspect
-import re
+import asyncio
 import traceback
-from dataclasses import dataclass
-from dataclasses import field as datafield
+from dataclasses import dataclass, replace
 from typing import Any
 
 from dateutil.parser import parse as parse_date
 
 from . import commands
+from .bus import invalidation_bus
+from .lexer import STRING, Lexer
+from .metrics import metrics
+from .output import BufferedBot, OutputBuffer
+from .registry import MethodInfo, registry
 from .utils import Types, Utils, config
+from .watchdog import Watchdog
 
+# Arguments that are converted into the type of the field named by another argument.
+COERCED_ARGUMENTS = {
+    "value": "attribute",
+    "old_value": "attribute",
+    "new_value": "attribute",
+    "filter_value": "filter_attribute",
+}
 
-@dataclass
+# Tortoise operators that compare against a single value of the field's type.
+COERCED_OPERATORS = {"not", "gt", "gte", "lt", "lte"}
+
+
+@dataclass(slots=True)
 class Value:
+    """
+    A parsed DexScript argument. Values are shared between every occurrence of the same
+    token in a script, so they must not be modified once they have been created.
+    """
+
     name: str
     type: Types = Types.DEFAULT
     value: Any = None
 
-    extra_data: list = datafield(default_factory=list)
+    extra_data: tuple = ()
 
     def __str__(self):
         return self.name
 
 
+@dataclass(slots=True)
+class Statement:
+    """
+    A line of DexScript that has been resolved into a command and its arguments.
+    """
+
+    text: str
+    command: type
+    info: MethodInfo
+    arguments: tuple
+
+    model: str | None = None
+
+    @property
+    def method(self) -> str:
+        return self.info.name
+
+
 class DexScriptParser:
     """
     This class is used to parse DexScript into Python code.
     """
 
-    def __init__(self, ctx, bot):
-        self.ctx = ctx
-        self.bot = bot
+    def __init__(self, ctx, bot, job=None):
+        self.ctx = OutputBuffer(ctx, config.outputdelay)
+        self.bot = BufferedBot(bot, self.ctx)
+        self.job = job
         # self.attachments = ctx.message.attachments
 
-        self.command_classes = inspect.getmembers(
-            commands,
-            lambda o: (
-                inspect.isclass(o)
-                and issubclass(o, commands.DexCommand)
-                and not issubclass(o, commands.Global)
-                and o.__name__ != "DexCommand"
-            ),
-        )
+        self.global_methods = registry.method_names(commands.Global)
+        self.class_names = registry.names()
+        self.model_names = set(Utils.models(True, key=str.lower))
+
+        self.model_metadata = {}
 
-        self.global_methods = [x for x in dir(commands.Global) if not x.startswith("__")]
+        self.watchdog = None
 
-    def create_value(self, line):
+    def create_value(self, line, quoted=False):
         value = Value(line)
         value.value = line
-        
+
+        if quoted:
+            return value
+
         lower = line.lower()
 
         type_dict = {
+            Types.VARIABLE: line.startswith("$") and len(line) > 1,
             Types.METHOD: lower in self.global_methods,
-            Types.CLASS: lower in [x[0].lower() for x in self.command_classes],
-            Types.MODEL: lower in Utils.models(True, key=str.lower),
+            Types.CLASS: lower in self.class_names,
+            Types.MODEL: lower in self.model_names,
             Types.DATETIME: Utils.is_date(lower) and lower.count("-") >= 2,
             Types.BOOLEAN: lower in ["true", "false"],
         }
@@ -68,18 +107,19 @@ class DexScriptParser:
 
         match value.type:
             case Types.MODEL:
-                model = Utils.fetch_model(line)
+                if lower not in self.model_metadata:
+                    model = Utils.fetch_model(line)
 
-                if model is None:
-                    raise Exception(f"'{line}' is not a valid model")
+                    if model is None:
+                        raise Exception(f"'{line}' is not a valid model")
 
-                string_key = Utils.extract_str_attr(model)
+                    self.model_metadata[lower] = (model, (Utils.extract_str_attr(model),))
+
+                model, value.extra_data = self.model_metadata[lower]
 
                 value.name = model.__name__
                 value.value = model
 
-                value.extra_data.append(string_key)
-
             case Types.BOOLEAN:
                 value.value = lower == "true"
 
@@ -88,51 +128,257 @@ class DexScriptParser:
 
         return value
 
+    def parse(self, code: str):
+        """
+        Converts DexScript code into a list of lines, where each line is a list of values.
+
+        Parameters
+        ----------
+        code: str
+            The code you want to parse.
+        """
+        lexer = Lexer(code)
+        values = {}
+        parsed_code = []
+
+        for tokens in lexer.lines():
+            line = []
+
+            for token in tokens:
+                text = lexer.text(token)
+                value = values.get((text, token.type))
+
+                if value is None:
+                    try:
+                        value = self.create_value(text, token.type == STRING)
+                    except Exception as error:
+                        raise Exception(f"Line {token.line}, column {token.column}: {error}")
+
+                    values[(text, token.type)] = value
+
+                line.append(value)
+
+            parsed_code.append(tuple(line))
+
+        return parsed_code
+
+    def resolve_command(self, line) -> Statement:
+        """
+        Resolves the command a line calls, validating its arguments.
+
+        Parameters
+        ----------
+        line: tuple[Value, ...]
+            The parsed line you want to resolve.
+        """
+        text = " > ".join(str(x) for x in line)
+        method = line[0]
+
+        if method.type not in (Types.METHOD, Types.CLASS):
+            raise Exception(f"'{method.name}' is not a valid command.")
+
+        if method.type == Types.CLASS:
+            if len(line) < 2:
+                raise Exception(f"'{method.name}' requires a method.")
+
+            command, method, arguments = registry.get(method.name), line[1], line[2:]
+        else:
+            command, arguments = commands.Global, line[1:]
+
+        info = registry.method(command, method.name.lower())
+
+        if info is None:
+            raise Exception(f"'{method.name}' is not a valid {command.__name__.upper()} method.")
+
+        if len(arguments) < info.minimum:
+            raise Exception(f"Argument missing when calling '{method.name}'.")
+
+        if info.maximum is not None and len(arguments) > info.maximum:
+            raise Exception(f"Too many arguments when calling '{method.name}'.")
+
+        model = dict(zip(info.parameters, arguments)).get("model")
+        model_name = model.name if model is not None and model.type == Types.MODEL else None
+
+        return Statement(text, command, info, arguments, model_name)
+
+    async def plan(self, parsed_code) -> list[Statement]:
+        """
+        Resolves the command of every line and converts values into the type of the model
+        field they belong to, so invalid scripts are rejected before any command runs.
+        Foreign key values are fetched using a single query per related model.
+
+        Parameters
+        ----------
+        parsed_code: list[tuple[Value, ...]]
+            The parsed code you want to plan.
+        """
+        statements = []
+        related = {}
+
+        # Instances created by earlier lines, which can't be fetched before the script runs.
+        created = {}
+
+        for line in parsed_code:
+            if line == ():
+                continue
+
+            statement = self.resolve_command(line)
+            statements.append(statement)
+
+            bound = dict(zip(statement.info.parameters, statement.arguments))
+
+            model = bound.get("model")
+            operator = bound.get("tortoise_operator")
+
+            if model is None or model.type != Types.MODEL:
+                continue
+
+            if statement.command is commands.Global and statement.method == "create":
+                created.setdefault((model.name, str(bound["identifier"])), len(statements))
+
+            if operator is not None and operator.name.lower() not in COERCED_OPERATORS:
+                continue
+
+            arguments = list(statement.arguments)
+
+            for name, attribute_name in COERCED_ARGUMENTS.items():
+                value, attribute = bound.get(name), bound.get(attribute_name)
+
+                if value is None or attribute is None or Types.VARIABLE in (
+                    value.type,
+                    attribute.type,
+                ):
+                    continue
+
+                field_type = Utils.get_field(model.value, attribute.name.lower())
+                index = statement.info.parameters.index(name)
+
+                if field_type is None:
+                    continue
+
+                if attribute.type == Types.MODEL:
+                    if field_type.__class__.__name__ == "ForeignKeyFieldInstance":
+                        related.setdefault(attribute.name, (attribute, []))[1].append(
+                            (statement, index, len(statements))
+                        )
+
+                    continue
+
+                try:
+                    coerced = Utils.coerce(field_type, value.name)
+                except Exception:
+                    raise Exception(
+                        f"`{statement.text}`: '{value}' is not a valid "
+                        f"{model.name} {attribute.name.lower()}"
+                    )
+
+                arguments[index] = replace(value, value=coerced)
+
+            statement.arguments = tuple(arguments)
+
+        for attribute, references in related.values():
+            string_key = attribute.extra_data[0]
+            identifiers = {str(x.arguments[index]) for x, index, _ in references}
+
+            instances = await attribute.value.filter(**{f"{string_key}__in": list(identifiers)})
+            metrics.query()
+
+            instances = {str(getattr(x, string_key)): x for x in instances}
+
+            for statement, index, position in references:
+                value = statement.arguments[index]
+                instance = instances.get(str(value))
+
+                if instance is None:
+                    if created.get((attribute.name, str(value)), position) < position:
+                        continue
+
+                    raise Exception(
+                        f"`{statement.text}`: {attribute.name.lower()} '{value}' does not exist"
+                    )
+
+                arguments = list(statement.arguments)
+                arguments[index] = replace(arguments[index], value=instance)
+
+                statement.arguments = tuple(arguments)
+
+        return statements
+
     def error(self, message, log):
         return (message, log)[config.debug]
 
     async def execute(self, code: str, run_commands=True):
-        shared_instance = commands.Shared(self.ctx.message.attachments)
+        if not config.watchdog:
+            return await self.run(code, run_commands)
 
-        split_code = [x for x in code.split("\n") if x.strip() != ""]
+        self.watchdog = Watchdog(config.watchdogthreshold)
+        self.watchdog.start()
 
-        parsed_code = [
-            [self.create_value(s.strip()) for s in re.findall(r"[^>]+", line)]
-            for line in split_code
-            if not line.strip().startswith("--")
-        ]
+        try:
+            return await self.run(code, run_commands)
+        finally:
+            self.watchdog.stop()
 
-        if not run_commands:
-            return parsed_code
+    async def run(self, code: str, run_commands=True):
+        shared_instance = commands.Shared(list(self.ctx.message.attachments))
 
-        for line2 in parsed_code:
-            if line2 == []:
-                continue
+        if run_commands:
+            shared_instance.prefetch()
 
-            method = line2[0]
+        try:
+            with metrics.timer("dexscript_parse_seconds"):
+                parsed_code = self.parse(code)
 
-            if method.type not in (Types.METHOD, Types.CLASS):
-                return self.error(
-                    f"'{method.name}' is not a valid command.", traceback.format_exc()
-                )
+            if not run_commands:
+                return parsed_code
+
+            return await self.run_lines(await self.plan(parsed_code), shared_instance)
+        finally:
+            await self.ctx.flush()
+            await shared_instance.close()
+
+    async def run_lines(self, statements: list[Statement], shared_instance):
+        for index, statement in enumerate(statements):
+            if self.job is not None:
+                self.job.progress(index, len(statements), statement.text)
+
+                # Background jobs yield between lines so they don't starve live traffic.
+                await asyncio.sleep(0)
 
-            if method.type == Types.CLASS:
-                line2.pop(0)
-                method = (getattr(commands, method.name.title()), line2[0])
-            else:
-                method = (commands.Global, line2[0])
+            arguments = [shared_instance.resolve(x) for x in statement.arguments]
 
-            line2.pop(0)
+            class_loaded = statement.command(self.bot, shared_instance)
+            command_name = f"{statement.command.__name__}.{statement.method}"
+
+            if self.watchdog is not None:
+                self.watchdog.line = statement.text
+                self.watchdog.command = command_name
 
-            class_loaded = commands.Global if method[0] == commands.Global else method[0]
-            class_loaded = class_loaded(self.bot, shared_instance)
             class_loaded.__loaded__()
 
-            method_call = getattr(class_loaded, method[1].name.lower())
+            writes = not statement.info.read_only
+
+            if writes:
+                for model_name in Utils.dependent_models(statement.model):
+                    shared_instance.mark_written(model_name)
+
+                Utils.invalidate(statement.model)
+
+            method_call = getattr(class_loaded, statement.method)
 
             try:
-                await method_call(self.ctx, *line2)
+                with metrics.command(command_name):
+                    await method_call(self.ctx, *arguments)
             except TypeError:
                 return self.error(
-                    f"Argument missing when calling '{method[1].name}'.", traceback.format_exc()
+                    f"Argument missing when calling '{statement.method.upper()}'.",
+                    traceback.format_exc(),
                 )
+            finally:
+                # Reads that ran while the command was writing may have cached old results.
+                if writes:
+                    Utils.invalidate(statement.model)
+                    await invalidation_bus.publish(statement.model)
+
+        if self.job is not None:
+            self.job.completed = len(statements)
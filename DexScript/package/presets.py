@@ -0,0 +1,202 @@
+import io
+import json
+import os
+import textwrap
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from functools import partial
+from pathlib import Path
+
+from .filesystem import FileSystem
+from .metrics import metrics
+
+PRESET_PATH = "eval_presets"
+INDEX_PATH = "dexscript_presets.json"
+CACHE_SIZE = 32
+
+
+@dataclass
+class PresetInfo:
+    """
+    Metadata about an eval preset, stored in the preset index.
+    """
+
+    name: str
+    author: str | None = None
+    created: float = 0
+    size: int = 0
+
+    runs: int = 0
+    last_run: float | None = None
+
+    def format(self) -> str:
+        last_run = "NEVER"
+
+        if self.last_run is not None:
+            last_run = time.strftime("%Y-%m-%d %H:%M", time.localtime(self.last_run))
+
+        return f"{self.name} | {self.size} BYTES | {self.runs} RUNS | LAST RUN {last_run}"
+
+
+class PresetStore:
+    """
+    Stores eval presets on disk, along with an index of their metadata. Presets are compiled
+    once and kept in a bounded, least-recently-used cache, keyed by their path and
+    modification time, so edited presets are recompiled on their next run.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = PRESET_PATH,
+        index_path: str | Path = INDEX_PATH,
+        size: int = CACHE_SIZE,
+    ):
+        self.path = Path(path)
+        self.index_path = Path(index_path)
+        self.size = size
+
+        self.presets: dict[str, PresetInfo] = {}
+        self.compiled = OrderedDict()
+
+        self._mtime = None
+
+    def file(self, name: str) -> Path:
+        return self.path / f"{name}.py"
+
+    def _scan(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            self.presets, self._mtime = {}, None
+            return
+
+        if mtime == self._mtime:
+            return
+
+        names = {x.name[:-3] for x in os.scandir(self.path) if x.name.endswith(".py")}
+
+        if self._mtime is None and self.index_path.is_file():
+            with open(self.index_path) as file:
+                self.presets = {x["name"]: PresetInfo(**x) for x in json.load(file)}
+
+        # Presets that were added or removed outside of DexScript.
+        for name in names - set(self.presets):
+            stat = os.stat(self.file(name))
+            self.presets[name] = PresetInfo(name, None, stat.st_mtime, stat.st_size)
+
+        for name in set(self.presets) - names:
+            del self.presets[name]
+
+        self._mtime = mtime
+
+    async def refresh(self):
+        """
+        Loads the index, rescanning the preset directory only if it has changed.
+        """
+        await FileSystem.run(self._scan)
+
+    async def save_index(self):
+        data = [asdict(x) for x in sorted(self.presets.values(), key=lambda x: x.name)]
+        await FileSystem.write(self.index_path, json.dumps(data, indent=2))
+
+    async def exists(self, name: str) -> bool:
+        await self.refresh()
+        return name in self.presets
+
+    async def names(self) -> list[PresetInfo]:
+        await self.refresh()
+        return sorted(self.presets.values(), key=lambda x: x.name)
+
+    @staticmethod
+    def _compile(source: str, filename: str):
+        # Presets run inside of a coroutine function, the same way the `eval` command runs code.
+        body = f"async def __preset__():\n{textwrap.indent(source, '  ')}"
+
+        try:
+            return compile(body, filename, "exec")
+        except SyntaxError as error:
+            raise Exception(f"Syntax error on line {error.lineno - 1}: {error.msg}")
+
+    async def save(self, name: str, source: str, author: str):
+        """
+        Compiles and saves a preset, raising an exception if it has a syntax error.
+
+        Parameters
+        ----------
+        name: str
+            The name of the preset.
+        source: str
+            The Python code the preset will run.
+        author: str
+            The user saving the preset.
+        """
+        self._compile(source, str(self.file(name)))
+
+        await FileSystem.write(self.file(name), source)
+        await self.refresh()
+
+        self.presets[name] = PresetInfo(name, author, time.time(), len(source.encode()))
+        await self.save_index()
+
+    async def remove(self, name: str):
+        await FileSystem.remove(self.file(name))
+        await self.refresh()
+
+        self.presets.pop(name, None)
+        await self.save_index()
+
+    def _load(self, path: Path):
+        key = (str(path), os.stat(path).st_mtime_ns)
+
+        if key in self.compiled:
+            self.compiled.move_to_end(key)
+            metrics.increment("dexscript_preset_cache_hits_total")
+            return self.compiled[key]
+
+        metrics.increment("dexscript_preset_cache_misses_total")
+
+        with open(path) as file:
+            code = self._compile(file.read(), str(path))
+
+        self.compiled[key] = code
+
+        while len(self.compiled) > self.size:
+            self.compiled.popitem(last=False)
+
+        return code
+
+    async def run(self, name: str, env: dict, stdout: io.StringIO):
+        """
+        Runs a preset and returns its return value. Everything the preset prints is written
+        to `stdout`, so output printed before an exception isn't lost.
+
+        Parameters
+        ----------
+        name: str
+            The name of the preset.
+        env: dict
+            The global variables the preset can access.
+        stdout: io.StringIO
+            The buffer the preset's `print` function writes to.
+        """
+        if not await self.exists(name):
+            raise Exception(f"`{name}` does not exists")
+
+        exec(await FileSystem.run(self._load, self.file(name)), env)
+
+        # Each preset gets its own `print`, since replacing `sys.stdout` would also capture
+        # the output of other presets and commands running at the same time.
+        env["print"] = partial(print, file=stdout)
+
+        try:
+            return await env["__preset__"]()
+        finally:
+            if name in self.presets:
+                self.presets[name].runs += 1
+                self.presets[name].last_run = time.time()
+
+                await self.save_index()
+
+
+preset_store = PresetStore()
@@ -0,0 +1,208 @@
+import importlib
+import importlib.util
+import inspect
+import os
+from dataclasses import dataclass
+from importlib.metadata import entry_points
+from pathlib import Path
+from typing import Any
+
+PLUGIN_PATH = "dexscript_plugins"
+ENTRY_POINT_GROUP = "dexscript.commands"
+
+
+@dataclass(slots=True)
+class MethodInfo:
+    """
+    Metadata about a command method, used to plan scripts without inspecting each line.
+    """
+
+    name: str
+    parameters: tuple
+    minimum: int
+    maximum: int | None
+    read_only: bool
+
+
+class CommandRegistry:
+    """
+    Maps DexScript class names to command classes. Built-in classes, classes exposed through
+    the `dexscript.commands` entry point group, and classes inside of the plugin directory
+    are discovered the first time a script needs them. Entry points and plugins are only
+    imported when a script first uses them.
+    """
+
+    def __init__(self, plugin_path: str | Path = PLUGIN_PATH):
+        self.plugin_path = Path(plugin_path)
+
+        self.loaders: dict[str, Any] = {}
+        self.loaded: dict[str, type] = {}
+        self.methods: dict[tuple, MethodInfo | None] = {}
+
+        self._discovered = False
+
+    def register(self, name: str, loader: Any):
+        """
+        Registers a command class. Classes that have already been registered under the same
+        name are not replaced.
+
+        Parameters
+        ----------
+        name: str
+            The name scripts will use to reference the class.
+        loader: type | str | EntryPoint | Path
+            The class itself, a `module:Class` string, an entry point, or a plugin file.
+        """
+        self.loaders.setdefault(name.lower(), loader)
+
+    @staticmethod
+    def builtin_commands() -> list[type]:
+        """
+        Returns every `DexCommand` subclass defined in the commands module, except for
+        `Global`, whose methods are called without a class name.
+        """
+        from . import commands
+
+        found, pending = [], list(commands.DexCommand.__subclasses__())
+
+        while pending:
+            command = pending.pop(0)
+            pending.extend(command.__subclasses__())
+
+            if command.__module__ == commands.__name__ and command is not commands.Global:
+                found.append(command)
+
+        return found
+
+    def discover(self):
+        """
+        Registers every built-in class, entry point, and plugin file. Entry points and
+        plugin files are not imported.
+        """
+        self._discovered = True
+
+        for command in self.builtin_commands():
+            self.register(command.__name__, command)
+
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+            self.register(entry_point.name, entry_point)
+
+        if not self.plugin_path.is_dir():
+            return
+
+        for name in sorted(os.listdir(self.plugin_path)):
+            if name.endswith(".py") and not name.startswith("_"):
+                self.register(name[:-3], self.plugin_path / name)
+
+    def names(self) -> set[str]:
+        if not self._discovered:
+            self.discover()
+
+        return set(self.loaders)
+
+    def _load(self, name: str, loader: Any) -> type:
+        if isinstance(loader, type):
+            return loader
+
+        if isinstance(loader, str):
+            module_name, class_name = loader.split(":")
+            return getattr(importlib.import_module(module_name), class_name)
+
+        if isinstance(loader, Path):
+            spec = importlib.util.spec_from_file_location(f"{PLUGIN_PATH}.{name}", loader)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+
+            return getattr(module, name.title())
+
+        return loader.load()
+
+    def get(self, name: str) -> type:
+        """
+        Returns a command class, importing it if it hasn't been used yet.
+
+        Parameters
+        ----------
+        name: str
+            The name of the class.
+        """
+        from .commands import DexCommand
+
+        name = name.lower()
+
+        if name in self.loaded:
+            return self.loaded[name]
+
+        if not self._discovered:
+            self.discover()
+
+        if name not in self.loaders:
+            raise Exception(f"'{name}' is not a valid command class.")
+
+        command = self._load(name, self.loaders[name])
+
+        if not (isinstance(command, type) and issubclass(command, DexCommand)):
+            raise Exception(f"'{name}' is not a DexScript command class.")
+
+        self.loaded[name] = command
+
+        return command
+
+    def method(self, command: type, method_name: str) -> MethodInfo | None:
+        """
+        Returns the metadata of a command method, or None if it isn't a command. Private
+        methods and helpers inherited from `DexCommand`, such as `filter_queryset`, are
+        not commands.
+
+        Parameters
+        ----------
+        command: type
+            The command class the method belongs to.
+        method_name: str
+            The name of the method.
+        """
+        from .commands import DexCommand
+
+        key = (command, method_name)
+
+        if key in self.methods:
+            return self.methods[key]
+
+        method_call = getattr(command, method_name, None)
+        inherited = method_call is getattr(DexCommand, method_name, None)
+        info = None
+
+        if (
+            not method_name.startswith("_")
+            and not inherited
+            and inspect.iscoroutinefunction(method_call)
+        ):
+            parameters = list(inspect.signature(method_call).parameters.values())[2:]
+            variadic = any(x.kind == x.VAR_POSITIONAL for x in parameters)
+            parameters = [x for x in parameters if x.kind != x.VAR_POSITIONAL]
+
+            info = MethodInfo(
+                method_name,
+                tuple(x.name for x in parameters),
+                len([x for x in parameters if x.default is x.empty]),
+                None if variadic else len(parameters),
+                method_name in command.READ_ONLY,
+            )
+
+        self.methods[key] = info
+
+        return info
+
+    def method_names(self, command: type) -> set[str]:
+        """
+        Returns the name of every command method of a command class.
+
+        Parameters
+        ----------
+        command: type
+            The command class.
+        """
+        return {x for x in dir(command) if self.method(command, x) is not None}
+
+
+registry = CommandRegistry()
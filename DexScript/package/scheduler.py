@@ -0,0 +1,307 @@
+import asyncio
+import json
+import random
+import re
+import time
+from dataclasses import asdict, dataclass
+from dataclasses import field as datafield
+from datetime import datetime, timedelta
+
+from .filesystem import FileSystem
+from .jobs import job_manager
+from .utils import config
+
+SCHEDULE_PATH = "dexscript_schedules.json"
+CHECK_INTERVAL = 30
+MAX_HISTORY = 20
+
+DURATION_RE = re.compile(r"^(\d+(?:\.\d+)?)\s*([smhd])$")
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+CRON_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+
+
+def parse_duration(text: str) -> float | None:
+    """
+    Converts a duration such as `30m` or `6h` into seconds, returning None if it's invalid.
+
+    Parameters
+    ----------
+    text: str
+        The duration you want to convert.
+    """
+    match = DURATION_RE.match(text.strip().lower())
+
+    if match is None:
+        return None
+
+    return float(match.group(1)) * DURATION_UNITS[match.group(2)]
+
+
+class Cron:
+    """
+    A five-field cron expression (minute, hour, day of month, month, day of week).
+    """
+
+    def __init__(self, expression: str):
+        parts = expression.split()
+
+        if len(parts) != 5:
+            raise Exception(f"'{expression}' is not a valid interval or cron expression")
+
+        self.fields = [
+            self._parse_field(part, *bounds, expression)
+            for part, bounds in zip(parts, CRON_RANGES)
+        ]
+
+        self.any_day = parts[2] == "*"
+        self.any_weekday = parts[4] == "*"
+
+    @staticmethod
+    def _parse_field(part: str, minimum: int, maximum: int, expression: str) -> set[int]:
+        values = set()
+
+        try:
+            for item in part.split(","):
+                step = 1
+
+                if "/" in item:
+                    item, step = item.split("/")
+                    step = int(step)
+
+                if item == "*":
+                    start, end = minimum, maximum
+                elif "-" in item:
+                    start, end = map(int, item.split("-"))
+                else:
+                    start = end = int(item)
+
+                values.update(range(start, end + 1, step))
+        except ValueError:
+            raise Exception(f"'{expression}' is not a valid cron expression")
+
+        if not values or min(values) < minimum or max(values) > maximum:
+            raise Exception(f"'{expression}' is not a valid cron expression")
+
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day = moment.day in self.fields[2]
+        weekday = (moment.weekday() + 1) % 7 in self.fields[4]
+
+        if self.any_day or self.any_weekday:
+            return day and weekday
+
+        return day or weekday
+
+    def next(self, after: datetime) -> datetime:
+        """
+        Returns the first time after `after` that matches the expression.
+        """
+        minutes, hours, _, months, _ = self.fields
+        moment = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * 5)
+
+        while moment < limit:
+            if moment.month not in months:
+                year, month = divmod(moment.month, 12)
+                moment = moment.replace(
+                    year=moment.year + year, month=month + 1, day=1, hour=0, minute=0
+                )
+                continue
+
+            if not self._day_matches(moment):
+                moment = (moment + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+
+            if moment.hour not in hours:
+                moment = (moment + timedelta(hours=1)).replace(minute=0)
+                continue
+
+            if moment.minute not in minutes:
+                moment += timedelta(minutes=1)
+                continue
+
+            return moment
+
+        raise Exception("The cron expression never runs")
+
+
+@dataclass
+class ScheduledScript:
+    """
+    DexScript code that runs automatically on an interval or cron expression.
+    """
+
+    name: str
+    code: str
+    when: str
+    channel_id: int
+
+    jitter: float = 0
+    next_run: float = 0
+    history: list = datafield(default_factory=list)
+
+    def validate(self):
+        """
+        Raises an exception if the script's interval is shorter than how often schedules
+        are checked, since it would be due on every check.
+        """
+        interval = parse_duration(self.when)
+
+        if interval is not None and interval < CHECK_INTERVAL:
+            raise Exception(
+                f"'{self.when}' is too short, intervals must be at least {CHECK_INTERVAL}s"
+            )
+
+    def schedule_next(self, now: float | None = None):
+        """
+        Calculates the next time the script will run, including a random jitter.
+        """
+        now = time.time() if now is None else now
+        interval = parse_duration(self.when)
+
+        if interval is not None:
+            next_run = now + interval
+        else:
+            next_run = Cron(self.when).next(datetime.fromtimestamp(now)).timestamp()
+
+        self.next_run = next_run + random.uniform(0, self.jitter)
+
+
+class ScheduledMessage:
+    def __init__(self, channel):
+        self.author = "scheduler"
+        self.channel = channel
+        self.attachments = []
+
+    async def add_reaction(self, emoji):
+        # Scheduled scripts aren't started by a message, so there's nothing to react to.
+        pass
+
+
+class ScheduledContext:
+    """
+    A minimal stand-in for `commands.Context` used by scripts that run on a schedule.
+    """
+
+    def __init__(self, bot, channel, name: str):
+        self.bot = bot
+        self.channel = channel
+        self.guild = getattr(channel, "guild", None)
+        self.author = f"schedule:{name}"
+        self.message = ScheduledMessage(channel)
+
+    async def send(self, *args, **kwargs):
+        return await self.channel.send(*args, **kwargs)
+
+    async def invoke(self, command, *args, **kwargs):
+        return await command(self, *args, **kwargs)
+
+
+class Scheduler:
+    """
+    Runs scheduled scripts as background jobs, so they share the job concurrency limit.
+    Schedules and their run history are stored on disk.
+    """
+
+    def __init__(self, path: str = SCHEDULE_PATH):
+        self.path = path
+        self.schedules: dict[str, ScheduledScript] = {}
+        self.running: dict[str, int] = {}
+
+        self._task = None
+
+    async def load(self):
+        if not await FileSystem.isfile(self.path):
+            return
+
+        data = json.loads(await FileSystem.read_text(self.path))
+        self.schedules = {x["name"]: ScheduledScript(**x) for x in data}
+
+    async def save(self):
+        data = [asdict(x) for x in self.schedules.values()]
+        await FileSystem.write(self.path, json.dumps(data, indent=2))
+
+    async def add(self, schedule: ScheduledScript):
+        if schedule.name in self.schedules:
+            raise Exception(f"`{schedule.name}` is already scheduled")
+
+        schedule.validate()
+
+        if schedule.next_run == 0:
+            schedule.schedule_next()
+
+        self.schedules[schedule.name] = schedule
+        await self.save()
+
+    async def remove(self, name: str):
+        if name not in self.schedules:
+            raise Exception(f"`{name}` is not scheduled")
+
+        del self.schedules[name]
+        await self.save()
+
+    def _finished(self, schedule: ScheduledScript, job):
+        self.running.pop(schedule.name, None)
+
+        schedule.history.append(
+            {
+                "job": job.id,
+                "started": job.started,
+                "finished": job.finished,
+                "status": job.status.value,
+                "error": job.error,
+            }
+        )
+        del schedule.history[:-MAX_HISTORY]
+
+        asyncio.create_task(self.save())
+
+    def run(self, bot, schedule: ScheduledScript):
+        """
+        Submits a scheduled script as a background job, unless it's already running.
+        """
+        if schedule.name in self.running:
+            return
+
+        channel = bot.get_channel(schedule.channel_id)
+
+        if channel is None:
+            return
+
+        ctx = ScheduledContext(bot, channel, schedule.name)
+        job = job_manager.submit(ctx, bot, schedule.code, config.jobconcurrency)
+
+        self.running[schedule.name] = job.id
+        job.task.add_done_callback(lambda _: self._finished(schedule, job))
+
+    async def _loop(self, bot):
+        await bot.wait_until_ready()
+
+        while True:
+            now = time.time()
+            due = [x for x in self.schedules.values() if x.next_run <= now]
+
+            for schedule in due:
+                self.run(bot, schedule)
+                schedule.schedule_next(now)
+
+            if due:
+                await self.save()
+
+            await asyncio.sleep(CHECK_INTERVAL)
+
+    async def start(self, bot):
+        self.stop()
+
+        await self.load()
+        self._task = asyncio.create_task(self._loop(bot))
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+scheduler = Scheduler()
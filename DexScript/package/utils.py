@@ -1,9 +1,12 @@
 import asyncio
 import contextlib
 import inspect
+import json
 import os
 import re
 from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
 from difflib import get_close_matches
 from enum import Enum
 from io import StringIO
@@ -13,6 +16,11 @@ from typing import Any, Callable
 import discord
 from ballsdex.core.models import Ball, Economy, Regime, Special  # noqa: F401, I001
 from dateutil.parser import parse as parse_date
+from tortoise.timezone import is_naive, make_aware
+
+from .cache import query_cache
+from .filesystem import ContentStore, DirectoryIndex, Download, FileSystem
+from .metrics import metrics
 
 START_CODE_BLOCK_RE = re.compile(r"^((```sql?)(?=\s)|(```))")
 FILENAME_RE = re.compile(r"^(.+)(\.\S+)$")
@@ -35,6 +43,7 @@ class Types(Enum):
     BOOLEAN = 3
     MODEL = 4
     DATETIME = 5
+    VARIABLE = 6
 
 
 @dataclass
@@ -46,9 +55,21 @@ class Settings:
     debug: bool = False
     versioncheck: bool = False
     reference: str = "main"
+    metricspath: str | None = None
+    watchdog: bool = False
+    watchdogthreshold: float = 0.1
+    journal: bool = True
+    journallimit: int = 10000
+    readconnection: str | None = None
+    cachettl: float = 30.0
+    invalidation: str | None = "auto"
+    jobconcurrency: int = 2
+    outputdelay: float = 1.0
 
 
 config = Settings()
+media_index = DirectoryIndex(MEDIA_PATH)
+media_store = ContentStore(MEDIA_PATH, media_index)
 
 
 @dataclass
@@ -78,13 +99,28 @@ class Utils:
     def is_image(path: str) -> bool:
         """
         Determines if a file is an image if it is found within the correct image directory.
+        Files directly inside of the image directory are looked up in the cached media index,
+        which should be refreshed beforehand using `Utils.refresh_media`.
 
         Parameters
         ----------
         path: str
             The path of the file.
         """
-        return os.path.isfile(Utils.image_path(path))
+        full_path = Utils.image_path(path)
+        name = full_path.removeprefix(f"{MEDIA_PATH}/").lstrip("/")
+
+        if "/" not in name:
+            return name in media_index
+
+        return os.path.isfile(full_path)
+
+    @staticmethod
+    async def refresh_media():
+        """
+        Rescans the image directory if it has changed since it was last scanned.
+        """
+        await FileSystem.run(media_index.refresh)
 
     @staticmethod
     def is_date(string: str) -> bool:
@@ -162,7 +198,10 @@ class Utils:
             if remaining == 1:
                 text = "There is `1` page remaining."
 
-            message = await ctx.send(
+            # The prompt is deleted later, so it can't be buffered with the rest of the output.
+            send = getattr(ctx, "send_now", ctx.send)
+
+            message = await send(
                 f"{text} Type `more` to continue or `file` to send all messages in a file"
             )
 
@@ -185,30 +224,49 @@ class Utils:
             break
 
     @staticmethod
-    async def save_file(attachment: discord.Attachment) -> Path:
+    def format_table(columns: list[str], rows: list[dict]) -> list[str]:
         """
-        Saves a `discord.Attachment` object into a directory.
+        Formats a list of rows into aligned table lines, including a header.
+
+        Parameters
+        ----------
+        columns: list[str]
+            The columns that will be displayed, in order.
+        rows: list[dict]
+            The rows you want to format, mapping each column to its value.
+        """
+        widths = {x: max([len(x), *(len(str(row[x])) for row in rows)]) for x in columns}
+
+        header = " | ".join(x.upper().ljust(widths[x]) for x in columns)
+        lines = [header, "-" * len(header)]
+
+        for row in rows:
+            lines.append(" | ".join(str(row[x]).ljust(widths[x]) for x in columns))
+
+        return lines
+
+    @staticmethod
+    async def save_file(attachment: discord.Attachment, download: Download | None = None) -> Path:
+        """
+        Saves a `discord.Attachment` object into the media directory under the digest of its
+        contents. If an identical file already exists, the existing file is returned.
 
         Parameters
         ----------
         attachment: discord.Attachment
             The attachment you want to save.
+        download: Download | None
+            The attachment's download, if it has already been downloaded.
         """
-        path = Path(f"{MEDIA_PATH}/{attachment.filename}")
         match = FILENAME_RE.match(attachment.filename)
 
         if not match:
             raise TypeError("The file you uploaded lacks an extension.")
 
-        i = 1
-
-        while path.exists():
-            path = Path(f"{MEDIA_PATH}/{match.group(1)}-{i}{match.group(2)}")
-            i = i + 1
+        if download is None:
+            download = await FileSystem.download(attachment)
 
-        await attachment.save(path)
-
-        return path.relative_to(MEDIA_PATH)
+        return Path(await media_store.store(download, match.group(2).lower()))
 
     @staticmethod
     def fetch_model(model: str):
@@ -222,6 +280,53 @@ class Utils:
         """
         return globals().get(Utils.pascal_case(model))
 
+    @staticmethod
+    def dependent_models(model_name: str | None) -> list[str | None]:
+        """
+        Returns the name of a model along with every model that references it through a
+        relation, directly or through other models. Writing to a model can change their rows
+        through cascades, or the names they display. If `model_name` is None, `[None]` is
+        returned, which stands for every model.
+
+        Parameters
+        ----------
+        model_name: str | None
+            The name of the model that is being written to.
+        """
+        model = None if model_name is None else Utils.fetch_model(model_name)
+
+        if model is None:
+            return [model_name]
+
+        names, pending = [], [model]
+
+        while pending:
+            current = pending.pop()
+
+            if current.__name__ in names:
+                continue
+
+            names.append(current.__name__)
+            meta = current._meta
+
+            for field in (*meta.backward_fk_fields, *meta.backward_o2o_fields, *meta.m2m_fields):
+                pending.append(meta.fields_map[field].related_model)
+
+        return names
+
+    @staticmethod
+    def invalidate(model_name: str | None):
+        """
+        Evicts the cached results of a model and every model that depends on it.
+
+        Parameters
+        ----------
+        model_name: str | None
+            The name of the model that has been written to, or None for every model.
+        """
+        for name in Utils.dependent_models(model_name):
+            query_cache.invalidate(name)
+
     @staticmethod
     def models(names=False, key: Callable | None = None):
         """
@@ -247,18 +352,16 @@ class Utils:
         return model_list
 
     @staticmethod
-    async def create_model(model, identifier, fields_only=False):
+    async def default_fields(model, identifier: str | None = None) -> dict:
         """
-        Creates a model instance while providing default values for all.
+        Returns default values for every required field of a model.
 
         Parameters
         ----------
         model: Model
             The tortoise model you want to use.
-        identifier: str
-            The name of the model instance.
-        fields_only: bool
-            Whether you want to return the fields created only or not (debugging).
+        identifier: str | None
+            The value identifier fields will use. If None, identifier fields are left out.
         """
         fields = {}
 
@@ -274,7 +377,9 @@ class Utils:
                 continue
 
             if field in special_list["Identifiers"]:
-                fields[field] = str(identifier)
+                if identifier is not None:
+                    fields[field] = str(identifier)
+
                 continue
 
             match field_type.__class__.__name__:
@@ -282,6 +387,7 @@ class Utils:
                     casing_field = Utils.pascal_case(field)
 
                     instance = await Utils.fetch_model(casing_field).first()
+                    metrics.query()
 
                     if instance is None:
                         raise Exception(f"Could not find default {casing_field}")
@@ -297,13 +403,234 @@ class Utils:
                 case _:
                     fields[field] = 1
 
+        return fields
+
+    @staticmethod
+    async def create_model(model, identifier, fields_only=False):
+        """
+        Creates a model instance while providing default values for all.
+
+        Parameters
+        ----------
+        model: Model
+            The tortoise model you want to use.
+        identifier: str
+            The name of the model instance.
+        fields_only: bool
+            Whether you want to return the fields created only or not (debugging).
+        """
+        fields = await Utils.default_fields(model, identifier)
+
         if fields_only:
             return fields
 
-        await model.create(**fields)
+        instance = await model.create(**fields)
+
+        metrics.query()
+        metrics.rows(1)
+
+        return instance
 
     @staticmethod
-    async def get_model(model, identifier: str):
+    def coerce(field_type, value):
+        """
+        Converts a raw value into the type a Tortoise field expects, raising an error
+        if the value is invalid.
+
+        Parameters
+        ----------
+        field_type: Field
+            The Tortoise field the value belongs to.
+        value: Any
+            The value you want to convert.
+        """
+        if value is None or (value == "" and field_type.null):
+            return None
+
+        text = str(value).strip()
+
+        match field_type.__class__.__name__:
+            case "IntField" | "SmallIntField" | "BigIntField":
+                return int(text)
+
+            case "FloatField":
+                return float(text)
+
+            case "DecimalField":
+                return Decimal(text)
+
+            case "BooleanField":
+                if text.lower() in ("true", "yes", "1"):
+                    return True
+
+                if text.lower() in ("false", "no", "0"):
+                    return False
+
+                raise ValueError(f"'{value}' is not a valid boolean")
+
+            case "DatetimeField":
+                return value if not isinstance(value, str) else parse_date(text)
+
+            case "DateField":
+                return value if not isinstance(value, str) else parse_date(text).date()
+
+            case "JSONField":
+                return json.loads(value) if isinstance(value, str) else value
+
+            case "IntEnumFieldInstance" | "CharEnumFieldInstance":
+                enum_type = field_type.enum_type
+                members = {x.name.lower(): x for x in enum_type}
+
+                if text.lower() in members:
+                    return members[text.lower()]
+
+                if field_type.__class__.__name__ == "IntEnumFieldInstance":
+                    return enum_type(int(text))
+
+                return enum_type(text)
+
+            case "CharField" | "TextField":
+                return str(value)
+
+        return value
+
+    @staticmethod
+    def same_value(field_type, current, value) -> bool:
+        """
+        Returns whether a stored value and a new value are equal once both are converted to
+        the field's type. Naive datetimes are compared in Tortoise's configured timezone.
+
+        Parameters
+        ----------
+        field_type: Field | None
+            The Tortoise field both values belong to.
+        current: Any
+            The value that is currently stored.
+        value: Any
+            The new value.
+        """
+        if field_type is not None:
+            with contextlib.suppress(Exception):
+                current, value = Utils.coerce(field_type, current), Utils.coerce(field_type, value)
+
+        if isinstance(current, datetime) and isinstance(value, datetime):
+            current, value = [make_aware(x) if is_naive(x) else x for x in (current, value)]
+
+        return current == value
+
+    @staticmethod
+    async def resolve_names(field_type, names: set[str]) -> dict[str, int]:
+        """
+        Resolves the names of foreign key targets to their primary keys using a single query.
+
+        Parameters
+        ----------
+        field_type: ForeignKeyFieldInstance
+            The foreign key field the names belong to.
+        names: set[str]
+            The names you want to resolve.
+        """
+        related_model = field_type.related_model
+        string_key = Utils.extract_str_attr(related_model)
+
+        resolved = await related_model.filter(**{f"{string_key}__in": list(names)}).values_list(
+            string_key, "pk"
+        )
+        metrics.query()
+
+        return {str(name): pk for name, pk in resolved}
+
+    @staticmethod
+    def convert_row(model, row: dict, resolved: dict) -> dict:
+        """
+        Converts a row of raw values into field values for a model.
+
+        Parameters
+        ----------
+        model: Value
+            The model the row belongs to.
+        row: dict
+            The row you want to convert, mapping attribute names to raw values.
+        resolved: dict
+            Foreign key names resolved using `Utils.resolve_names`, per attribute.
+        """
+        converted = {}
+
+        for column, value in row.items():
+            column = column.strip().lower()
+            field_type = Utils.get_field(model.value, column)
+
+            if column == model.value._meta.pk_attr:
+                continue
+
+            if field_type is None:
+                raise Exception(f"'{column}' is not a valid {model.name} attribute")
+
+            if field_type.__class__.__name__ != "ForeignKeyFieldInstance":
+                converted[column] = Utils.coerce(field_type, value)
+                continue
+
+            if not value:
+                converted[f"{column}_id"] = None
+                continue
+
+            if str(value) not in resolved.get(column, {}):
+                raise Exception(f"'{value}' is not a valid {column}")
+
+            converted[f"{column}_id"] = resolved[column][str(value)]
+
+        if converted.get(model.extra_data[0]) in (None, ""):
+            raise Exception(f"'{model.extra_data[0]}' is missing")
+
+        return converted
+
+    @staticmethod
+    async def convert_rows(model, rows: list[tuple[int, dict | Exception]]):
+        """
+        Converts rows of raw values into field values for a model, resolving foreign key
+        names in batch. Returns a list of converted rows and a list of errors.
+
+        Parameters
+        ----------
+        model: Value
+            The model the rows belong to.
+        rows: list[tuple[int, dict | Exception]]
+            The rows you want to convert along with their line numbers.
+        """
+        fields_map = model.value._meta.fields_map
+        names = {}
+
+        for _, row in rows:
+            if isinstance(row, Exception):
+                continue
+
+            for column, value in row.items():
+                column = column.strip().lower()
+                field_type = fields_map.get(column)
+
+                if field_type.__class__.__name__ == "ForeignKeyFieldInstance" and value:
+                    names.setdefault(column, set()).add(str(value))
+
+        resolved = {
+            column: await Utils.resolve_names(fields_map[column], column_names)
+            for column, column_names in names.items()
+        }
+
+        values, errors = [], []
+
+        for line, row in rows:
+            try:
+                if isinstance(row, Exception):
+                    raise row
+
+                values.append((line, Utils.convert_row(model, row, resolved)))
+            except Exception as error:
+                errors.append(f"Line {line}: {error}")
+
+        return values, errors
+
+    @staticmethod
+    async def get_model(model, identifier: str, connection=None, cached=False):
         """
         Returns a model instance, providing autocorrection.
 
@@ -313,12 +640,33 @@ class Utils:
             The model you want to use.
         identifier: str
             The identifier of the model instance you are trying to return.
+        connection: BaseDBAsyncClient | None
+            The database connection used to fetch the instance, or the default connection
+            if None.
+        cached: bool
+            Whether the instance can be returned from the query cache. This should only be
+            used by read-only commands.
         """
-        correction_list = await model.value.all().values_list(model.extra_data[0], flat=True)
+        if isinstance(getattr(identifier, "value", None), model.value):
+            return identifier.value
+
+        string_key = model.extra_data[0]
+        ttl = config.cachettl if cached else 0
+
+        queryset = model.value.all()
+
+        if connection is not None:
+            queryset = queryset.using_db(connection)
+
+        correction_list = await query_cache.fetch(
+            model.name, ("identifiers",), queryset.values_list(string_key, flat=True), ttl
+        )
+
+        corrected = Utils.autocorrect(str(identifier), correction_list)
 
         try:
-            returned_model = await model.value.filter(
-                **{model.extra_data[0]: Utils.autocorrect(str(identifier), correction_list)}
+            returned_model = await query_cache.fetch(
+                model.name, ("get", corrected), queryset.filter(**{string_key: corrected}), ttl
             )
         except AttributeError:
             raise Exception(f"'{model}' is not a valid model.")
@@ -347,6 +695,23 @@ class Utils:
 
         return fetched_list
 
+    @staticmethod
+    def image_fields(model) -> list[str]:
+        """
+        Returns a list of a model's fields that store image paths.
+
+        Parameters
+        ----------
+        model: Model
+            The model you want to fetch image fields from.
+        """
+        return Utils.fetch_fields(
+            model,
+            lambda _, field_type: (
+                field_type.__class__.__name__ == "CharField" and field_type.max_length == 200
+            ),
+        )
+
     @staticmethod
     def get_field(model, field: str):
         """
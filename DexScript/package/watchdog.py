@@ -0,0 +1,111 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+
+from .metrics import metrics
+
+
+@dataclass
+class Stall:
+    """
+    An event loop stall detected while a DexScript line was running.
+    """
+
+    line: str | None
+    command: str
+    duration: float
+    stack: str
+
+    def format(self, include_stack=False) -> str:
+        text = f"{self.duration * 1000:.0f}ms stall during `{self.line or 'parsing'}`"
+
+        if include_stack:
+            text += f"\n{self.stack}"
+
+        return text
+
+
+class Watchdog:
+    """
+    Measures event loop stalls while DexScript code runs and attributes them to the line
+    that was executing, along with a stack sample of the event loop thread.
+    """
+
+    def __init__(self, threshold: float, interval: float = 0.02, stack_limit: int = 8):
+        self.threshold = threshold
+        self.interval = interval
+        self.stack_limit = stack_limit
+
+        self.line: str | None = None
+        self.command = "none"
+        self.stalls: list[Stall] = []
+
+        self._beat = time.monotonic()
+        self._loop_thread = threading.get_ident()
+        self._stopped = threading.Event()
+        self._heartbeat_task = None
+        self._monitor_thread = None
+
+    async def _heartbeat(self):
+        while True:
+            self._beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+
+    def _monitor(self):
+        stalled = False
+
+        while not self._stopped.wait(self.interval):
+            lag = time.monotonic() - self._beat - self.interval
+
+            if lag < self.threshold:
+                stalled = False
+                continue
+
+            if stalled:
+                self.stalls[-1].duration = lag
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = "".join(traceback.format_stack(frame)[-self.stack_limit :]) if frame else ""
+
+            self.stalls.append(Stall(self.line, self.command, lag, stack))
+            stalled = True
+
+    def start(self):
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopped.clear()
+
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        self._monitor_thread = threading.Thread(
+            target=self._monitor, name="dexscript-watchdog", daemon=True
+        )
+        self._monitor_thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+
+        if self._monitor_thread is not None:
+            self._monitor_thread.join()
+
+        for stall in self.stalls:
+            metrics.observe("dexscript_loop_stall_seconds", stall.duration, command=stall.command)
+
+    def report(self, include_stack=False) -> list[str]:
+        """
+        Returns a list of formatted stalls, sorted from longest to shortest.
+
+        Parameters
+        ----------
+        include_stack: bool
+            Whether the stack sample of each stall should be included.
+        """
+        stalls = sorted(self.stalls, key=lambda stall: stall.duration, reverse=True)
+
+        return [stall.format(include_stack) for stall in stalls]
@@ -0,0 +1,104 @@
+"""
+Compares the memory used by the parsed form of a DexScript script before and after
+values were shared between tokens. The old form is rebuilt the way the parser used to
+build it: every token lexed up front, a new `Value` with its own `__dict__` and
+`extra_data` list per token, and a list per line. The new form comes from
+`DexScriptParser.parse`, which shares one slotted `Value` per distinct token and stores
+each line as a tuple.
+
+Both forms are built from the same script and measured with tracemalloc. This requires
+the bot's dependencies (Ballsdex, Tortoise ORM, and discord.py) to be installed. Run it
+from the repository root:
+
+    python -m benchmarks.parser_memory [LINES]
+"""
+
+import gc
+import sys
+import tracemalloc
+from dataclasses import dataclass
+from dataclasses import field as datafield
+from types import SimpleNamespace
+from typing import Any
+
+from DexScript.package.lexer import STRING, Lexer
+from DexScript.package.parser import DexScriptParser
+from DexScript.package.utils import Types
+
+DEFAULT_LINES = 10_000
+DISTINCT_BALLS = 500
+
+
+@dataclass
+class LegacyValue:
+    """
+    `Value` as it was before it was slotted and shared between tokens.
+    """
+
+    name: str
+    type: Types = Types.DEFAULT
+    value: Any = None
+
+    extra_data: list = datafield(default_factory=list)
+
+
+def build_script(lines: int) -> str:
+    return "\n".join(
+        f'UPDATE > BALL > "Country {x % DISTINCT_BALLS}" > RARITY > {x % 7}.5'
+        for x in range(lines)
+    )
+
+
+def legacy_parse(parser: DexScriptParser, code: str) -> list[list[LegacyValue]]:
+    lexer = Lexer(code)
+    parsed_code = []
+
+    for tokens in list(lexer.lines()):
+        line = []
+
+        for token in tokens:
+            value = parser.create_value(lexer.text(token), token.type == STRING)
+            line.append(LegacyValue(value.name, value.type, value.value, list(value.extra_data)))
+
+        parsed_code.append(line)
+
+    return parsed_code
+
+
+def measure(function, *args) -> tuple[int, int]:
+    """
+    Returns the memory retained by the result of a function and its peak memory usage.
+    """
+    gc.collect()
+    tracemalloc.start()
+
+    result = function(*args)
+    retained, peak = tracemalloc.get_traced_memory()
+
+    tracemalloc.stop()
+    del result
+
+    return retained, peak
+
+
+def main(lines: int):
+    parser = DexScriptParser(SimpleNamespace(), None)
+    code = build_script(lines)
+
+    # Warms up caches both forms share, such as model lookups, so neither pays for them.
+    parser.parse(build_script(DISTINCT_BALLS))
+
+    results = {
+        "old": measure(legacy_parse, parser, code),
+        "new": measure(parser.parse, code),
+    }
+
+    print(f"{lines} lines, {DISTINCT_BALLS} distinct balls")
+    print(f"{'IR':>4} | {'RETAINED MIB':>12} | {'PEAK MIB':>8}")
+
+    for name, (retained, peak) in results.items():
+        print(f"{name:>4} | {retained / 1024**2:>12.2f} | {peak / 1024**2:>8.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_LINES)
@@ -0,0 +1,98 @@
+"""
+Checks that read-only queries are routed to `config.readconnection` using two local SQLite
+databases, where the primary and the replica hold different rows. This requires the bot's
+dependencies (Tortoise ORM, discord.py, and Ballsdex) to be installed.
+
+This file isn't installed with DexScript. Run it from the repository root:
+
+    python -m checks.replica_check
+"""
+
+import asyncio
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+from tortoise import Tortoise, connections, fields
+from tortoise.models import Model
+from tortoise.utils import get_schema_sql
+
+from DexScript.package.commands import DexCommand, Shared
+from DexScript.package.utils import Utils, config
+
+
+class Item(Model):
+    id = fields.IntField(pk=True)
+    name = fields.CharField(max_length=64)
+
+
+def check(name: str, result, expected) -> bool:
+    passed = result == expected
+    print(f"{'PASS' if passed else 'FAIL'} | {name} | {result!r} (expected {expected!r})")
+
+    return passed
+
+
+async def main() -> bool:
+    directory = Path(tempfile.mkdtemp(prefix="dexscript-replica-"))
+
+    await Tortoise.init(
+        config={
+            "connections": {
+                "default": f"sqlite://{directory / 'primary.sqlite3'}",
+                "replica": f"sqlite://{directory / 'replica.sqlite3'}",
+            },
+            "apps": {"models": {"models": [__name__], "default_connection": "default"}},
+        }
+    )
+
+    try:
+        primary, replica = connections.get("default"), connections.get("replica")
+
+        # The replica only has the schema of the primary, since no models use it by default.
+        await Tortoise.generate_schemas()
+        await replica.execute_script(get_schema_sql(primary, safe=True))
+
+        await Item.create(name="primary")
+        await Item.create(name="replica", using_db=replica)
+
+        config.readconnection = "replica"
+        config.cachettl = 0
+
+        model = SimpleNamespace(name="Item", value=Item, extra_data=("name",))
+        shared = Shared()
+        command = DexCommand(None, shared)
+
+        results = [
+            check(
+                "read before writing",
+                await command.read(model, Item.all()).values_list("name", flat=True),
+                ["replica"],
+            ),
+            check(
+                "get_model before writing",
+                (await Utils.get_model(model, "replica", shared.read_connection(model))).name,
+                "replica",
+            ),
+        ]
+
+        shared.mark_written("Item")
+
+        results.append(
+            check(
+                "read after writing",
+                await command.read(model, Item.all()).values_list("name", flat=True),
+                ["primary"],
+            )
+        )
+
+        return all(results)
+    finally:
+        await Tortoise.close_connections()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)